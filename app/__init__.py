@@ -1,3 +1,12 @@
 """app包"""
-from .database import db
-from .reminder import reminder_service
+
+
+def __getattr__(name):
+    """按需导入全局实例，导入子模块时不连带导入数据库和调度器"""
+    if name == "db":
+        from .database import db
+        return db
+    if name == "reminder_service":
+        from .reminder import reminder_service
+        return reminder_service
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
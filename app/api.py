@@ -0,0 +1,532 @@
+"""本地 HTTP/JSON 接口 - 由应用进程统一读写数据库，脚本通过接口操作待办
+
+基于 asyncio 的 HTTP/1.1 服务（支持 keep-alive 连接复用），默认只监听本机地址。
+读请求在线程池中并发执行（每个请求从连接池取独立连接），写请求交给数据库的串行写入队列，
+并发到达的写入合并到同一个事务中提交。
+列表类接口返回 ETag（数据变化标识 + 请求地址，其他进程的写入同样使标识变化），请求带 If-None-Match 且数据未变化时直接返回 304，
+不查询数据库；结果随时间变化的接口（/stats 的逾期数）不返回 ETag。
+带请求体的请求必须是 Content-Type: application/json；Host 必须是本机地址（或监听地址），
+带 Origin 的请求来源也必须是这些地址，网页不能跨站修改本地数据。
+
+接口:
+    GET    /todos?keyword=&category_id=&tag_id=&status=&sort=&reverse=&after=&limit=
+    GET    /todos/<id>
+    POST   /todos
+    PATCH  /todos/<id>
+    DELETE /todos/<id>
+    POST   /todos/<id>/snooze       {"minutes": 5}
+    POST   /todos/batch/complete    {"ids": [...]}
+    POST   /todos/batch/delete      {"ids": [...]}
+    POST   /todos/import            {"items": [...]}（记录格式同 app/importer.py，一次请求批量创建）
+    GET    /search?q=&category_id=&tag_id=&status=
+    GET    /stats
+    GET    /categories
+    GET    /tags
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time as dt_time
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+# 创建/更新待办时接受的字段
+TODO_FIELDS = (
+    "title", "description", "priority", "category_id", "reminder_time", "tag_ids",
+    "is_recurring", "recurring_type", "recurring_time", "recurring_weekdays",
+    "recurring_monthday", "exclude_holidays",
+)
+DATETIME_FIELDS = ("reminder_time",)
+TIME_FIELDS = ("recurring_time",)
+# 字段类型：str 字符串、int 整数、bool 布尔、ints 整数列表，带 ? 的可以为 null
+FIELD_TYPES = {
+    "title": "str", "description": "str?", "priority": "int", "category_id": "int?",
+    "reminder_time": "str?", "tag_ids": "ints?", "is_recurring": "bool", "recurring_type": "str?",
+    "recurring_time": "str?", "recurring_weekdays": "ints?", "recurring_monthday": "int?",
+    "exclude_holidays": "bool", "completed": "bool",
+}
+TYPE_NAMES = {"str": "字符串", "int": "整数", "bool": "布尔值", "ints": "整数列表"}
+# 允许访问的本机主机名（另加监听地址）
+LOCAL_HOSTS = ("localhost", "127.0.0.1", "::1")
+
+
+class HttpError(Exception):
+    """请求错误，返回对应的 HTTP 状态码"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _plain(value):
+    """JSON 序列化时转换日期时间"""
+    if isinstance(value, (datetime, date, dt_time)):
+        return value.isoformat()
+    raise TypeError(f"无法序列化: {type(value).__name__}")
+
+
+def todo_to_dict(todo):
+    """待办转换为接口返回的字典"""
+    return {
+        "id": todo.id,
+        "title": todo.title,
+        "description": todo.description or "",
+        "priority": todo.priority,
+        "category_id": todo.category_id,
+        "category": todo.category.name if todo.category else None,
+        "tags": [{"id": tag.id, "name": tag.name} for tag in todo.tags],
+        "reminder_time": todo.reminder_time,
+        "created_at": todo.created_at,
+        "completed": bool(todo.completed),
+        "completed_at": todo.completed_at,
+        "is_recurring": bool(todo.is_recurring),
+        "recurring_type": todo.recurring_type,
+        "recurring_time": todo.recurring_time,
+        "recurring_weekdays": todo.get_recurring_weekdays(),
+        "recurring_monthday": todo.recurring_monthday,
+        "exclude_holidays": bool(todo.exclude_holidays),
+    }
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _check_type(kind, value):
+    """值是否符合 FIELD_TYPES 中的类型"""
+    if kind.endswith("?"):
+        if value is None:
+            return True
+        kind = kind[:-1]
+    if kind == "str":
+        return isinstance(value, str)
+    if kind == "int":
+        return _is_int(value)
+    if kind == "bool":
+        return isinstance(value, bool)
+    return isinstance(value, list) and all(_is_int(item) for item in value)
+
+
+def _todo_fields(body):
+    """从请求体中取出待办字段，校验类型和取值并转换时间"""
+    from .models import PRIORITY_MAP, RECURRING_TYPES
+
+    if not isinstance(body, dict):
+        raise HttpError(400, "请求体必须是 JSON 对象")
+    unknown = [key for key in body if key not in TODO_FIELDS and key != "completed"]
+    if unknown:
+        raise HttpError(400, f"未知字段: {', '.join(unknown)}")
+    for key, value in body.items():
+        kind = FIELD_TYPES[key]
+        if not _check_type(kind, value):
+            nullable = "或 null" if kind.endswith("?") else ""
+            raise HttpError(400, f"{key} 必须是{TYPE_NAMES[kind.rstrip('?')]}{nullable}")
+
+    if "priority" in body and body["priority"] not in PRIORITY_MAP:
+        raise HttpError(400, f"priority 只能是: {', '.join(map(str, PRIORITY_MAP))}")
+    if "recurring_type" in body and body["recurring_type"] not in RECURRING_TYPES:
+        raise HttpError(400, f"recurring_type 只能是: {', '.join(k for k in RECURRING_TYPES if k)}")
+    if any(day not in range(7) for day in body.get("recurring_weekdays") or ()):
+        raise HttpError(400, "recurring_weekdays 取值为 0-6（周一为 0）")
+    if body.get("recurring_monthday") is not None and body["recurring_monthday"] not in range(1, 32):
+        raise HttpError(400, "recurring_monthday 取值为 1-31")
+
+    fields = dict(body)
+    for key in DATETIME_FIELDS + TIME_FIELDS:
+        if fields.get(key) == "":
+            fields[key] = None  # 空字符串表示清除
+    try:
+        for key in DATETIME_FIELDS:
+            if fields.get(key):
+                fields[key] = datetime.fromisoformat(fields[key])
+        for key in TIME_FIELDS:
+            if fields.get(key):
+                fields[key] = dt_time.fromisoformat(fields[key])
+    except (TypeError, ValueError) as e:
+        raise HttpError(400, f"时间格式错误: {e}")
+    return fields
+
+
+def _ids(body):
+    """批量操作的待办ID列表"""
+    ids = body.get("ids") if isinstance(body, dict) else None
+    if not isinstance(ids, list) or not all(_is_int(i) for i in ids):
+        raise HttpError(400, "ids 必须是整数列表")
+    return ids
+
+
+def _int_param(query, name, default=None):
+    value = query.get(name)
+    if value in (None, ""):
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise HttpError(400, f"{name} 必须是整数")
+
+
+def _encode_cursor(cursor):
+    """分页游标编码为不透明字符串"""
+    if cursor is None:
+        return None
+    raw = json.dumps(list(cursor), default=_plain)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(token):
+    """解码分页游标（各排序键的取值，时间由数据库按列类型还原）"""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw)
+    except ValueError:
+        raise HttpError(400, "after 游标无效")
+    if not isinstance(values, list):
+        raise HttpError(400, "after 游标无效")
+    return tuple(values)
+
+
+class ApiServer:
+    """本地 HTTP 接口服务，在独立线程的事件循环中运行"""
+
+    def __init__(self, host="127.0.0.1", port=8765, workers=8):
+        self.host = host
+        self.port = port
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api")
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._connections = {}  # 连接处理任务 -> 连接的 writer（只在事件循环线程中访问）
+        # (方法, 路径正则, 处理函数, 是否返回 ETag)
+        self._routes = [
+            ("GET", r"/todos", self._list_todos, True),
+            ("POST", r"/todos", self._create_todo, False),
+            ("POST", r"/todos/batch/complete", self._batch_complete, False),
+            ("POST", r"/todos/batch/delete", self._batch_delete, False),
+            ("POST", r"/todos/import", self._import_todos, False),
+            ("GET", r"/todos/(\d+)", self._get_todo, True),
+            ("PATCH", r"/todos/(\d+)", self._update_todo, False),
+            ("DELETE", r"/todos/(\d+)", self._delete_todo, False),
+            ("POST", r"/todos/(\d+)/snooze", self._snooze_todo, False),
+            ("GET", r"/search", self._search, True),
+            ("GET", r"/stats", self._stats, False),  # 逾期数随时间变化，不缓存
+            ("GET", r"/categories", self._categories, True),
+            ("GET", r"/tags", self._tags, True),
+        ]
+        self._routes = [
+            (method, re.compile(pattern + "$"), handler, cacheable)
+            for method, pattern, handler, cacheable in self._routes
+        ]
+
+    # ========== 启动/停止 ==========
+
+    def start(self):
+        """在后台线程中启动服务，监听失败时抛出异常"""
+        started = threading.Event()
+        errors = []
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            try:
+                self._server = self._loop.run_until_complete(
+                    asyncio.start_server(self._handle_connection, self.host, self.port)
+                )
+            except OSError as e:
+                errors.append(e)
+                started.set()
+                return
+            self.port = self._server.sockets[0].getsockname()[1]
+            started.set()
+            self._loop.run_forever()
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="api-server", daemon=True)
+        self._thread.start()
+        started.wait()
+        if errors:
+            raise errors[0]
+
+    def stop(self):
+        """停止服务：关闭监听和所有客户端连接，等待连接处理任务结束后停止事件循环"""
+        if self._loop is not None and self._loop.is_running():
+            future = asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop)
+            try:
+                future.result(timeout=5)
+            except Exception:
+                pass
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+        self._executor.shutdown(wait=False)
+
+    async def _shutdown(self):
+        """关闭监听和客户端连接（keep-alive 连接上等待中的任务一并取消）"""
+        self._server.close()
+        tasks = list(self._connections)
+        for task, writer in self._connections.items():
+            writer.close()
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self._server.wait_closed()
+
+    # ========== HTTP ==========
+
+    async def _handle_connection(self, reader, writer):
+        """处理一个连接上的请求（keep-alive 时依次处理多个请求）"""
+        task = asyncio.current_task()
+        self._connections[task] = writer
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, version = request_line.decode("latin-1").split()
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length") or 0)
+                body = await reader.readexactly(length) if length else b""
+
+                status, payload, etag = await self._dispatch(method, target, headers, body)
+                keep_alive = (
+                    version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                )
+                writer.write(self._response(status, payload, etag, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass  # 客户端断开或请求格式错误
+        except asyncio.CancelledError:
+            pass  # 停止服务
+        finally:
+            self._connections.pop(task, None)
+            writer.close()
+
+    async def _dispatch(self, method, target, headers, body):
+        """路由请求，返回 (状态码, 响应数据, ETag)"""
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        path_matched = False
+        for route_method, pattern, handler, cacheable in self._routes:
+            match = pattern.match(url.path)
+            if not match:
+                continue
+            path_matched = True
+            if route_method != method:
+                continue
+
+            from .database import db
+
+            error = self._check_request(method, headers, body)
+            if error:
+                return error
+
+            etag = None
+            if cacheable:
+                digest = hashlib.sha1(target.encode()).hexdigest()[:16]
+                etag = f'W/"{db.change_token}-{digest}"'
+                if headers.get("if-none-match") == etag:
+                    return 304, None, etag
+
+            try:
+                data = json.loads(body) if body else None
+            except ValueError:
+                return 400, {"error": "请求体不是有效的 JSON"}, None
+
+            loop = asyncio.get_running_loop()
+            try:
+                status, payload = await loop.run_in_executor(
+                    self._executor, handler, match.groups(), query, data
+                )
+            except HttpError as e:
+                return e.status, {"error": str(e)}, None
+            except Exception as e:
+                return 500, {"error": str(e)}, None
+            return status, payload, etag if status == 200 else None
+
+        if path_matched:
+            return 405, {"error": "不支持的请求方法"}, None
+        return 404, {"error": "接口不存在"}, None
+
+    def _check_request(self, method, headers, body):
+        """拒绝跨站请求：检查 Host、Origin 和请求体类型，通过时返回 None"""
+        host = urlsplit("//" + headers.get("host", "")).hostname
+        if self.host in ("", "0.0.0.0", "::"):
+            # 监听所有地址时允许通过网络访问，只要求同源
+            allowed = {host}
+        else:
+            allowed = set(LOCAL_HOSTS) | {self.host}
+            if host not in allowed:
+                return 403, {"error": "Host 不是本机地址"}, None
+
+        origin = headers.get("origin")
+        if origin is not None and urlsplit(origin).hostname not in allowed:
+            return 403, {"error": "不允许跨站请求"}, None
+        if body:
+            content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+            if content_type != "application/json":
+                return 415, {"error": "请求体必须是 application/json"}, None
+        return None
+
+    @staticmethod
+    def _response(status, payload, etag, keep_alive):
+        """生成 HTTP 响应"""
+        body = b""
+        if payload is not None and status != 304:
+            body = json.dumps(payload, ensure_ascii=False, default=_plain).encode("utf-8")
+
+        lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}"]
+        if body:
+            lines.append("Content-Type: application/json; charset=utf-8")
+        lines.append(f"Content-Length: {len(body)}")
+        if etag:
+            lines.append(f"ETag: {etag}")
+        lines.append("Connection: keep-alive" if keep_alive else "Connection: close")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+    # ========== 接口 ==========
+
+    def _list_todos(self, args, query, body):
+        from .database import db
+
+        sort = query.get("sort", "priority")
+        if sort not in db.SORT_COLUMNS:
+            raise HttpError(400, f"sort 只能是: {', '.join(db.SORT_COLUMNS)}")
+        limit = min(max(_int_param(query, "limit", 100), 1), 1000)
+        try:
+            todos, cursor = db.get_todo_page(
+                keyword=query.get("keyword") or None,
+                category_id=_int_param(query, "category_id"),
+                tag_id=_int_param(query, "tag_id"),
+                status=query.get("status") or None,
+                sort=sort,
+                reverse=query.get("reverse") in ("1", "true"),
+                after=_decode_cursor(query.get("after")),
+                limit=limit,
+                lite=True,
+            )
+        except ValueError:
+            raise HttpError(400, "after 游标无效")
+        return 200, {"items": [todo_to_dict(todo) for todo in todos], "next": _encode_cursor(cursor)}
+
+    def _get_todo(self, args, query, body):
+        from .database import db
+
+        todo = db.get_todo(int(args[0]))
+        if todo is None:
+            raise HttpError(404, "待办不存在")
+        return 200, todo_to_dict(todo)
+
+    def _create_todo(self, args, query, body):
+        from .database import db
+
+        fields = _todo_fields(body)
+        if not fields.get("title"):
+            raise HttpError(400, "缺少 title")
+        completed = fields.pop("completed", False)
+        todo_id = db.create_todo(**fields)
+        if completed:
+            db.complete_todo(todo_id)
+        return 201, {"id": todo_id}
+
+    def _update_todo(self, args, query, body):
+        from .database import db
+
+        todo_id = int(args[0])
+        fields = _todo_fields(body)
+        if "completed" in fields:
+            fields["completed_at"] = datetime.now() if fields["completed"] else None
+        todo = db.update_todo(todo_id, **fields)
+        return self._write_result(db, todo_id, todo)
+
+    def _delete_todo(self, args, query, body):
+        from .database import db
+
+        todo_id = int(args[0])
+        return self._write_result(db, todo_id, db.delete_todo(todo_id))
+
+    def _snooze_todo(self, args, query, body):
+        from .database import db
+
+        todo_id = int(args[0])
+        minutes = body.get("minutes") if isinstance(body, dict) else None
+        if not _is_int(minutes) or minutes <= 0:
+            raise HttpError(400, "minutes 必须是正整数")
+        return self._write_result(db, todo_id, db.snooze_reminder(todo_id, minutes))
+
+    @staticmethod
+    def _write_result(db, todo_id, result):
+        """单条写操作的响应：延迟写入模式下不等待提交，返回 202"""
+        if db.write_behind:
+            return 202, {"id": todo_id}
+        if not result:
+            raise HttpError(404, "待办不存在")
+        return 200, {"id": todo_id}
+
+    def _batch_complete(self, args, query, body):
+        from .database import db
+
+        ids = _ids(body)
+        db.batch_complete(ids)
+        return 200, {"count": len(ids)}
+
+    def _batch_delete(self, args, query, body):
+        from .database import db
+
+        ids = _ids(body)
+        db.batch_delete(ids)
+        return 200, {"count": len(ids)}
+
+    def _import_todos(self, args, query, body):
+        from .database import db
+        from .importer import parse_record
+
+        items = body.get("items") if isinstance(body, dict) else None
+        if not isinstance(items, list):
+            raise HttpError(400, "items 必须是列表")
+        try:
+            records = [parse_record(item) for item in items]
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            raise HttpError(400, f"记录格式错误: {e}")
+        return 201, {"count": db.bulk_import(records)}
+
+    def _search(self, args, query, body):
+        from .database import db
+
+        todos = db.search_todos(
+            query.get("q", ""),
+            category_id=_int_param(query, "category_id"),
+            tag_id=_int_param(query, "tag_id"),
+            status=query.get("status") or None,
+            lite=True,
+        )
+        return 200, {"items": [todo_to_dict(todo) for todo in todos]}
+
+    def _stats(self, args, query, body):
+        from .database import db
+        return 200, db.get_stats()
+
+    def _categories(self, args, query, body):
+        from .database import db
+        return 200, {"items": [
+            {"id": cat.id, "name": cat.name, "color": cat.color} for cat in db.get_all_categories()
+        ]}
+
+    def _tags(self, args, query, body):
+        from .database import db
+        return 200, {"items": [
+            {"id": tag.id, "name": tag.name, "color": tag.color} for tag in db.get_all_tags()
+        ]}
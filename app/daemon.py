@@ -0,0 +1,70 @@
+"""无界面模式 - 只运行提醒服务，通过输出（标准输出/日志文件/Webhook）投递提醒
+
+用法: python main.py --daemon [--log 文件路径] [--webhook 地址] [--api [主机:]端口] [--quiet]
+                             [--catch-up once|each|off] [--catch-up-limit N]
+
+不导入 tkinter 及界面模块，可在没有桌面环境的服务器上运行。
+没有界面可以完成或稍后提醒，提醒投递后即标记为已处理。
+"""
+import argparse
+import signal
+import threading
+
+
+def main(argv=None):
+    """命令行入口，返回退出码"""
+    parser = argparse.ArgumentParser(prog="main.py --daemon", description="无界面提醒服务")
+    parser.add_argument("--log", metavar="PATH", help="追加写入提醒日志（每行一条 JSON）")
+    parser.add_argument("--webhook", metavar="URL", help="以 JSON POST 提醒到指定地址")
+    parser.add_argument("--api", metavar="[HOST:]PORT", help="同时启动本地 HTTP 接口")
+    parser.add_argument("--quiet", action="store_true", help="不输出到标准输出")
+    parser.add_argument("--catch-up", choices=["once", "each", "off"], default="once",
+                        help="补发停机或休眠期间错过的循环提醒：每个待办一次（默认）、每次都补发、不补发")
+    parser.add_argument("--catch-up-limit", type=int, default=20, metavar="N", help="一次最多补发的提醒数（默认 20）")
+    args = parser.parse_args(argv)
+
+    from .reminder import reminder_service
+    from .database import db
+    from .sinks import StdoutSink, LogFileSink, WebhookSink
+
+    if not args.quiet:
+        reminder_service.add_sink(StdoutSink())
+    if args.log:
+        reminder_service.add_sink(LogFileSink(args.log))
+    if args.webhook:
+        reminder_service.add_sink(WebhookSink(args.webhook))
+    reminder_service.auto_acknowledge = True
+    reminder_service.catch_up_mode = args.catch_up
+    reminder_service.catch_up_limit = max(args.catch_up_limit, 0)
+
+    stop = threading.Event()
+    for name in ("SIGINT", "SIGTERM", "SIGBREAK"):
+        if hasattr(signal, name):
+            signal.signal(getattr(signal, name), lambda signum, frame: stop.set())
+
+    reminder_service.start()
+    api_server = start_api(args.api) if args.api else None
+    if not args.quiet:
+        print("TodoX 提醒服务已启动（无界面模式），按 Ctrl+C 退出", flush=True)
+        if api_server:
+            print(f"HTTP 接口: http://{api_server.host}:{api_server.port}/", flush=True)
+
+    # 带超时等待，保证 Windows 下也能及时响应 Ctrl+C
+    while not stop.wait(1):
+        pass
+
+    if api_server:
+        api_server.stop()
+    reminder_service.stop()
+    db.flush()
+    return 0
+
+
+def start_api(address):
+    """按 [主机:]端口 启动本地 HTTP 接口"""
+    from .api import ApiServer
+
+    host, _, port = address.rpartition(":")
+    server = ApiServer(host or "127.0.0.1", int(port))
+    server.start()
+    return server
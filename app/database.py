@@ -1,20 +1,243 @@
 """数据库操作层"""
-from datetime import datetime, date
+import atexit
+import json
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from datetime import datetime, date, timedelta
 from sqlalchemy.orm import sessionmaker, joinedload
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, exists, func, literal, select, text, DateTime, Integer, Float
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 from .models import (
-    Todo, Category, Tag, TodoTag, Holiday,
-    init_database, get_database_path, PRIORITY_HIGH, PRIORITY_MEDIUM, PRIORITY_LOW
+    Todo, Category, Tag, TodoTag, Holiday, ReminderOccurrence, RecurrenceOccurrence, AppState,
+    init_database, init_fulltext_index, get_database_path,
+    FULLTEXT_TABLE, FULLTEXT_MIN_LENGTH, FULLTEXT_INSERT_TRIGGER, FULLTEXT_INSERT_TRIGGER_DDL,
+    PRIORITY_HIGH, PRIORITY_MEDIUM, PRIORITY_LOW
 )
+from .records import TodoRecord, RecordLookups
+from .recurrence import RecurrenceRule, OCCURRENCE_HORIZON_DAYS, OCCURRENCE_RETENTION_DAYS
+from .holidays import HolidayCalendar, holiday_calendar
+
+
+def _json_list(values):
+    """列表序列化为 JSON（空列表不调用 json.dumps）"""
+    return json.dumps(values) if values else "[]"
+
+
+class _WriteQueue:
+    """串行写入队列 - 所有写操作在同一个后台线程中依次执行
+
+    写线程每次把已在队列中等待的操作合并到同一个事务中提交（组提交，不额外等待）；
+    开启延迟写入（write-behind）后，还会等待一个时间窗口收集随后到达的操作。
+    批次中有操作失败时整批回滚，再逐个重新执行，只有失败的操作报错。
+    每个写事务同时记录写入者标记（本进程随机前缀 + 版本号），
+    写入时发现上一次的标记不是本进程写入的，说明期间有其他进程写入了数据库。
+    """
+
+    STAMP_KEY = "writer_stamp"
+    STAMP_QUERY = "SELECT value FROM app_state WHERE key = ?"
+    _STAMP_SELECT = text("SELECT value FROM app_state WHERE key = :key")
+    _STAMP_UPSERT = text(
+        "INSERT INTO app_state (key, value) VALUES (:key, :value) "
+        "ON CONFLICT(key) DO UPDATE SET value = excluded.value"
+    )
+
+    def __init__(self, session_factory, engine, nonce, stamp=None):
+        self._Session = session_factory
+        self._engine = engine
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._local = threading.local()  # 各线程最近一次未等待的写操作
+        self.window = 0  # 合并窗口（秒），0 表示只合并已排队的操作
+        self.max_batch = 500  # 每个事务最多合并的操作数
+        self.version = 0  # 已提交的写事务数
+        self._nonce = nonce
+        self.stamp = stamp  # 本进程最近一次提交的写入者标记（打开时为数据库中已有的标记）
+        self.external_writes = 0  # 写入时发现其他进程写入的次数
+
+    @property
+    def write_behind(self):
+        """是否开启了延迟写入"""
+        return self.window > 0
+
+    def submit(self, op, wait=True, on_commit=None):
+        """提交写操作 op(session)
+
+        wait=True 时等待提交完成并返回 op 的返回值；否则立即返回 Future。
+        on_commit(result) 在提交成功后调用（不等待时在写线程中调用）。
+        """
+        if threading.current_thread() is self._thread:
+            # 写线程内的嵌套写操作直接执行
+            result = self._execute(op)
+            if on_commit:
+                on_commit(result)
+            return result
+
+        future = Future()
+        self._ensure_started()
+        self._queue.put((op, future, None if wait else on_commit))
+        if not wait:
+            self._local.pending = future
+            return future
+
+        result = future.result()
+        if on_commit:
+            on_commit(result)
+        return result
+
+    def sync(self):
+        """等待当前线程已提交但未等待的写操作完成（保证读到自己的写入）"""
+        future = getattr(self._local, "pending", None)
+        if future is not None:
+            self._local.pending = None
+            try:
+                future.result()
+            except Exception:
+                pass  # 失败由提交方通过 Future 处理
+
+    def flush(self):
+        """等待队列中所有写操作完成"""
+        if self._thread is None or threading.current_thread() is self._thread:
+            return
+        future = Future()
+        self._queue.put((lambda session: None, future, None))
+        future.result()
+
+    def _ensure_started(self):
+        """按需启动写线程"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        """写线程主循环"""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                try:
+                    if timeout > 0:
+                        batch.append(self._queue.get(timeout=timeout))
+                    else:
+                        batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            if len(batch) == 1:
+                op, future, on_commit = batch[0]
+                try:
+                    self._finish(future, on_commit, self._execute(op), None)
+                except BaseException as e:
+                    self._finish(future, on_commit, None, e)
+                continue
+
+            try:
+                results = self._execute_batch([op for op, _, _ in batch])
+            except Exception:
+                results = None
+
+            for index, (op, future, on_commit) in enumerate(batch):
+                if results is not None:
+                    self._finish(future, on_commit, results[index], None)
+                    continue
+                # 整批回滚后逐个重新执行
+                try:
+                    self._finish(future, on_commit, self._execute(op), None)
+                except BaseException as e:
+                    self._finish(future, on_commit, None, e)
+
+    def _finish(self, future, on_commit, result, error):
+        """设置写操作结果，未等待的操作在此处调用提交回调"""
+        if error is not None:
+            future.set_exception(error)
+            return
+
+        future.set_result(result)
+        if on_commit is not None:
+            try:
+                on_commit(result)
+            except Exception:
+                pass
+
+    def _execute(self, op):
+        """在独立会话中执行写操作并提交"""
+        session = self._Session()
+        try:
+            result = op(session)
+            stamp = self._stamp(session, session.connection()) if session.in_transaction() else None
+            session.commit()
+            self._committed(stamp)
+            return result
+        except BaseException:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def _stamp(self, executor, connection):
+        """在当前写事务中记录写入者标记，返回新标记；事务中没有写语句时不记录，返回 None
+
+        executor 为会话或连接；pysqlite 在第一条写语句之前才开始数据库事务
+        """
+        if not connection.connection.dbapi_connection.in_transaction:
+            return None
+        previous = executor.execute(self._STAMP_SELECT, {"key": self.STAMP_KEY}).scalar()
+        if previous != self.stamp:
+            self.external_writes += 1
+        stamp = f"{self._nonce}:{self.version + 1}"
+        executor.execute(self._STAMP_UPSERT, {"key": self.STAMP_KEY, "value": stamp})
+        return stamp
+
+    def _committed(self, stamp):
+        """写事务提交后更新标记和版本号"""
+        if stamp is None:
+            return
+        self.stamp = stamp
+        self.version += 1
+
+    def _execute_batch(self, ops):
+        """在同一个事务中依次执行多个写操作，每个操作使用独立会话"""
+        with self._engine.connect() as conn:
+            transaction = conn.begin()
+            try:
+                results = []
+                for op in ops:
+                    # rollback_only：会话提交只刷新到连接，不提交外层事务
+                    session = self._Session(bind=conn, join_transaction_mode="rollback_only")
+                    try:
+                        results.append(op(session))
+                        session.commit()
+                    finally:
+                        session.close()
+                stamp = self._stamp(conn, conn)
+                transaction.commit()
+                self._committed(stamp)
+                return results
+            except BaseException:
+                if transaction.is_active:
+                    transaction.rollback()
+                raise
 
 
 class Database:
-    """数据库操作类"""
+    """数据库操作类
+
+    读操作每次使用独立会话（从连接池取连接，WAL 模式下可并发读），
+    写操作统一交给串行写入队列执行，可以在多个线程中同时使用。
+    创建实例时不连接数据库，首次读写（或调用 open()）时才建表、迁移并写入默认数据。
+    """
 
     _instance = None
-    _engine = None
-    _Session = None
+    _open_lock = threading.Lock()
+    # 打开数据库后才存在的属性，首次访问时自动打开
+    _OPEN_ATTRIBUTES = frozenset(("_engine", "_Session", "_writer", "_fulltext", "_watch"))
 
     def __new__(cls):
         if cls._instance is None:
@@ -23,14 +246,56 @@ class Database:
         return cls._instance
 
     def _init(self):
-        """初始化数据库连接"""
-        self._engine = init_database()
-        self._Session = sessionmaker(bind=self._engine)
-        self._ensure_defaults()
+        """初始化（不连接数据库）"""
+        self._opened = False
+        self._on_write_error = None
+        self._listeners = []
+        self._lookup_listeners = []
+        self._lookups = None  # 精简记录共用的分类/标签查找表，首次使用时加载
+        self._occurrences_until = None  # 循环提醒已展开到的时间
+        self._last_write = datetime.now()
+
+    def __getattr__(self, name):
+        """首次访问数据库连接相关属性时打开数据库"""
+        if name in Database._OPEN_ATTRIBUTES:
+            self.open()
+            return object.__getattribute__(self, name)
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
 
-    def _ensure_defaults(self):
+    def open(self, pragmas=None):
+        """打开数据库（建表、迁移、全文索引、默认数据），可在后台线程中提前调用，重复调用无影响
+
+        pragmas: 覆盖默认 SQLITE_PRAGMAS 中的配置项（见 init_database），需在首次读写之前指定
+        """
+        with self._open_lock:
+            if self._opened:
+                if pragmas:
+                    raise RuntimeError("数据库已打开，PRAGMA 配置需在首次读写之前指定")
+                return
+            engine = init_database(pragmas)
+            # 提交后不过期属性，返回的对象在会话关闭后仍可读取
+            Session = sessionmaker(bind=engine, expire_on_commit=False)
+            fulltext = init_fulltext_index(engine)
+            self._ensure_defaults(Session)
+            # 监视连接只读取 PRAGMA data_version，其他任何连接（包括其他进程）提交写入后其值变化
+            self._watch_lock = threading.Lock()
+            self._nonce = uuid.uuid4().hex[:8]
+            watch = sqlite3.connect(get_database_path(), check_same_thread=False)
+            stamp = watch.execute(_WriteQueue.STAMP_QUERY, (_WriteQueue.STAMP_KEY,)).fetchone()
+            # 上次检查时的 (data_version, 本进程写事务数, 发现的其他进程写入次数)
+            self._checked = (watch.execute("PRAGMA data_version").fetchone()[0], 0, 0)
+            writer = _WriteQueue(Session, engine, self._nonce, stamp[0] if stamp else None)
+            # 全部就绪后再对其他线程可见
+            self._watch = watch
+            self._fulltext = fulltext
+            self._writer = writer
+            self._Session = Session
+            self._engine = engine
+            self._opened = True
+
+    def _ensure_defaults(self, Session):
         """确保默认数据存在"""
-        session = self._Session()
+        session = Session()
         try:
             # 默认分类
             if not session.query(Category).first():
@@ -56,28 +321,215 @@ class Database:
 
     @property
     def session(self):
-        """获取新的数据库会话"""
+        """获取新的数据库会话（先等待当前线程未完成的延迟写入）"""
+        self._writer.sync()
         return self._Session()
 
+    def _write(self, op, changed=None, defer=False, lookup=None):
+        """执行写操作 op(session)，由写入队列串行提交
+
+        changed(result) 返回需要通知的待办ID列表；lookup 为变更的分类/标签/假期类型。
+        defer=True 且开启了延迟写入时不等待提交，返回 None，提交后在写线程中通知。
+        """
+        def on_commit(result):
+            if lookup:
+                self._notify_lookup(lookup)
+            todo_ids = changed(result) if changed else None
+            if todo_ids:
+                self._notify(todo_ids)
+
+        if defer and self._writer.write_behind:
+            future = self._writer.submit(op, wait=False, on_commit=on_commit)
+            future.add_done_callback(self._report_write_error)
+            return None
+        return self._writer.submit(op, on_commit=on_commit)
+
+    # ========== 延迟写入 ==========
+
+    def enable_write_behind(self, window=0.05, max_batch=500, on_error=None):
+        """开启延迟写入：window 秒内的写操作合并为一个事务提交
+
+        开启后不需要返回值的写操作（更新、完成、删除、稍后提醒等）不再等待提交，
+        失败时调用 on_error(异常)；创建类操作仍等待提交以返回ID。
+        同一线程随后的读操作会先等待自己的写入完成。
+        """
+        self._writer.max_batch = max_batch
+        self._on_write_error = on_error
+        self._writer.window = window
+        if not getattr(self, "_flush_registered", False):
+            self._flush_registered = True
+            atexit.register(self.flush)
+
+    def disable_write_behind(self):
+        """关闭延迟写入并等待已排队的写操作完成"""
+        self._writer.window = 0
+        self.flush()
+
+    def flush(self):
+        """等待所有已排队的写操作提交完成"""
+        self._writer.flush()
+
+    @property
+    def write_behind(self):
+        """是否开启了延迟写入（开启时可延迟的写操作返回 None）"""
+        return self._writer.write_behind
+
+    @property
+    def change_token(self):
+        """数据变化标识（用于缓存校验），任何进程提交写入后都会变化
+
+        由本次打开时生成的随机前缀和监视连接上的 PRAGMA data_version 组成，
+        重启后 data_version 重新计数也不会与之前的标识重复
+        """
+        version = self._data_version()
+        return f"{self._nonce}.{version}"
+
+    def check_external_changes(self):
+        """检查自上次检查以来其他进程（导入脚本、其他实例等）是否写入了数据库
+
+        有写入时刷新分类/标签/假期并通知监听者，返回 True，调用方重新加载内存中的待办。
+        判断依据：写入队列在写入时发现上一次的写入者标记不是本进程的，
+        或当前标记不是本进程最近一次写入的，
+        或本进程期间没有写入而 PRAGMA data_version 变化（不记录标记的写入者，如 sqlite3 命令行）。
+        本进程正在提交时可能误报一次，只会多一次重新加载
+        """
+        writer = self._writer
+        watch = self._watch
+        with self._watch_lock:
+            data_version = watch.execute("PRAGMA data_version").fetchone()[0]
+            stamp = watch.execute(_WriteQueue.STAMP_QUERY, (_WriteQueue.STAMP_KEY,)).fetchone()
+            last_data_version, last_version, last_external = self._checked
+            version, external = writer.version, writer.external_writes
+            self._checked = (data_version, version, external)
+        changed = (
+            external != last_external
+            or (stamp[0] if stamp else None) != writer.stamp
+            or (data_version != last_data_version and version == last_version)
+        )
+        if changed:
+            for kind in ("categories", "tags", "holidays"):
+                self._notify_lookup(kind)
+        return changed
+
+    def _data_version(self):
+        """监视连接上的 PRAGMA data_version"""
+        watch = self._watch
+        with self._watch_lock:
+            return watch.execute("PRAGMA data_version").fetchone()[0]
+
+    def _report_write_error(self, future):
+        """延迟写入失败时调用 on_error 回调"""
+        error = future.exception()
+        if error is not None and self._on_write_error is not None:
+            try:
+                self._on_write_error(error)
+            except Exception:
+                pass
+
+    # ========== 变更通知 ==========
+
+    def add_listener(self, callback):
+        """注册待办变更监听，回调参数为变更的待办ID列表"""
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        """移除待办变更监听"""
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def add_lookup_listener(self, callback):
+        """注册分类/标签/假期变更监听，回调参数为变更类型：categories、tags 或 holidays"""
+        if callback not in self._lookup_listeners:
+            self._lookup_listeners.append(callback)
+
+    def remove_lookup_listener(self, callback):
+        """移除分类/标签/假期变更监听"""
+        if callback in self._lookup_listeners:
+            self._lookup_listeners.remove(callback)
+
+    def _notify_lookup(self, kind):
+        """通知监听者分类/标签/假期已变更"""
+        if self._lookups is not None:
+            # 先刷新共享查找表，监听者读取精简记录时即为新数据
+            try:
+                self._refresh_lookups(self._lookups, kind)
+            except Exception:
+                pass
+        for callback in list(self._lookup_listeners):
+            try:
+                callback(kind)
+            except Exception:
+                pass
+
+    def _notify(self, todo_ids):
+        """通知监听者待办已变更"""
+        self._last_write = datetime.now()
+        todo_ids = [int(todo_id) for todo_id in todo_ids]
+        for callback in list(self._listeners):
+            try:
+                callback(todo_ids)
+            except Exception:
+                pass  # 监听者异常不影响数据操作
+
+    # ========== 精简记录 ==========
+
+    def record_lookups(self):
+        """精简记录共用的分类/标签查找表（分类或标签变更时自动刷新）"""
+        if self._lookups is None:
+            lookups = RecordLookups()
+            self._refresh_lookups(lookups)
+            self._lookups = lookups
+        return self._lookups
+
+    def _refresh_lookups(self, lookups, kind=None):
+        """重新读取查找表中的分类（kind="categories"）、标签（kind="tags"）或全部"""
+        if kind in (None, "categories"):
+            lookups.categories = {cat.id: cat for cat in self.get_all_categories()}
+        if kind in (None, "tags"):
+            lookups.tags = {tag.id: tag for tag in self.get_all_tags()}
+
+    @staticmethod
+    def _tag_ids_column():
+        """待办的标签ID列表（JSON 文本）"""
+        return select(func.json_group_array(TodoTag.tag_id)).where(
+            TodoTag.todo_id == Todo.id
+        ).correlate(Todo).scalar_subquery().label("tag_ids")
+
+    def _todo_query(self, session, lite=False):
+        """待办查询：lite=True 时只查询列（含标签ID），否则查询 ORM 对象并预加载分类和标签"""
+        if lite:
+            return session.query(*Todo.__table__.columns, self._tag_ids_column())
+        return session.query(Todo).options(
+            joinedload(Todo.category),
+            joinedload(Todo.tags)
+        )
+
+    def _to_records(self, rows):
+        """查询结果行转换为精简记录"""
+        lookups = self.record_lookups()
+        return [TodoRecord(row._mapping, lookups) for row in rows]
+
     # ========== Todo 操作 ==========
 
-    def get_all_todos(self, include_completed=True):
-        """获取所有待办"""
+    def get_all_todos(self, include_completed=True, lite=False):
+        """获取所有待办
+
+        lite=True 时返回 TodoRecord 精简记录（列表视图使用），否则返回 Todo 对象
+        """
         session = self.session
         try:
-            query = session.query(Todo).options(
-                joinedload(Todo.category),
-                joinedload(Todo.tags)
-            )
+            query = self._todo_query(session, lite)
             if not include_completed:
                 query = query.filter(Todo.completed == False)
-            return query.order_by(
+            todos = query.order_by(
                 Todo.completed,
                 Todo.priority,
                 Todo.created_at.desc()
             ).all()
         finally:
             session.close()
+        return self._to_records(todos) if lite else todos
 
     def get_todo(self, todo_id):
         """获取单个待办"""
@@ -90,96 +542,233 @@ class Database:
         finally:
             session.close()
 
-    def search_todos(self, keyword, category_id=None, tag_id=None, include_completed=True):
-        """搜索待办"""
+    def get_todos_by_ids(self, todo_ids, loaded=False):
+        """按ID批量获取待办，返回 {待办ID: 待办}
+
+        loaded=True 时同时加载分类和标签（用于显示），否则不加载
+        """
         session = self.session
         try:
-            query = session.query(Todo).options(
-                joinedload(Todo.category),
-                joinedload(Todo.tags)
+            query = session.query(Todo)
+            if loaded:
+                query = query.options(joinedload(Todo.category), joinedload(Todo.tags))
+            todos = query.filter(Todo.id.in_(list(todo_ids))).all()
+            return {todo.id: todo for todo in todos}
+        finally:
+            session.close()
+
+    def search_todos(self, keyword, category_id=None, tag_id=None, include_completed=True, status=None,
+                     lite=False):
+        """搜索待办
+
+        status: None/"all" 全部, "pending" 待完成, "completed" 已完成
+        lite=True 时返回 TodoRecord 精简记录
+        """
+        session = self.session
+        try:
+            query = self._todo_query(session, lite)
+            query, rank = self._filter_todos(
+                query, keyword, category_id, tag_id, status, include_completed
             )
 
-            if not include_completed:
-                query = query.filter(Todo.completed == False)
+            order_by = [Todo.completed, Todo.priority, Todo.created_at.desc()]
+            if rank is not None:
+                # 按相关度排序
+                order_by.insert(1, rank)
 
-            if keyword:
-                query = query.filter(
-                    or_(
-                        Todo.title.contains(keyword),
-                        Todo.description.contains(keyword)
-                    )
-                )
+            todos = query.order_by(*order_by).all()
+        finally:
+            session.close()
+        return self._to_records(todos) if lite else todos
 
-            if category_id:
-                query = query.filter(Todo.category_id == category_id)
+    def get_todo_page(self, keyword=None, category_id=None, tag_id=None, status=None,
+                      sort="priority", reverse=False, after=None, limit=500, lite=False):
+        """按列排序分页获取待办（键集分页）
 
-            if tag_id:
-                query = query.join(TodoTag).filter(TodoTag.tag_id == tag_id)
+        排序依次为：所选列、未完成在前、相关度（使用全文索引时）、优先级、创建时间（新的在前）、ID
+        after: 上一页返回的游标，None 表示第一页
+        lite=True 时返回 TodoRecord 精简记录
+        返回 (待办列表, 下一页游标)，没有更多数据时游标为 None
+        """
+        column = self.SORT_COLUMNS.get(sort, Todo.priority)
+        session = self.session
+        try:
+            query = self._todo_query(session, lite)
+            query, rank = self._filter_todos(query, keyword, category_id, tag_id, status)
+            if rank is not None:
+                rank = rank.label("rank")
+                query = query.add_columns(rank)
+            keys = self._page_keys(column, reverse, rank)
 
-            return query.order_by(
-                Todo.completed,
-                Todo.priority,
-                Todo.created_at.desc()
-            ).all()
+            if after is not None:
+                query = query.filter(self._keyset_after(keys, after))
+
+            order_by = [key.desc() if descending else key for key, descending in keys]
+            rows = query.order_by(*order_by).limit(limit + 1).all()
         finally:
             session.close()
 
-    def get_todos_to_remind(self):
-        """获取需要提醒的待办"""
+        more = len(rows) > limit
+        rows = rows[:limit]
+        cursor = None
+        if more:
+            last = rows[-1]
+            item = last[0] if rank is not None and not lite else last
+            cursor = tuple(
+                last.rank if key is rank else getattr(item, key.key) for key, _ in keys
+            )
+        if lite:
+            todos = self._to_records(rows)
+        else:
+            todos = [row[0] for row in rows] if rank is not None else rows
+        return todos, cursor
+
+    def count_todos(self, keyword=None, category_id=None, tag_id=None, status=None):
+        """统计符合条件的待办数量"""
         session = self.session
         try:
-            now = datetime.now()
-            return session.query(Todo).options(
-                joinedload(Todo.category),
-                joinedload(Todo.tags)
-            ).filter(
-                and_(
-                    Todo.completed == False,
-                    Todo.reminder_time != None,
-                    Todo.reminder_time <= now
-                )
-            ).all()
+            query, _ = self._filter_todos(
+                session.query(func.count(Todo.id)), keyword, category_id, tag_id, status
+            )
+            return query.scalar()
         finally:
             session.close()
 
-    def get_recurring_todos_for_today(self):
-        """获取今天需要循环提醒的待办"""
+    # 可排序的列（界面列名 -> 数据库列）
+    SORT_COLUMNS = {
+        "id": Todo.id,
+        "completed": Todo.completed,
+        "priority": Todo.priority,
+        "reminder": Todo.reminder_time,
+        "created": Todo.created_at,
+    }
+
+    @staticmethod
+    def _page_keys(column, reverse, rank=None):
+        """分页排序键 [(排序表达式, 是否降序)]
+
+        所选列按 reverse 决定方向，其后的键方向固定：未完成在前、相关度、优先级、创建时间倒序、ID倒序
+        """
+        keys = [(column, reverse)]
+        if column is Todo.id:
+            return keys
+        for key in (Todo.completed, rank, Todo.priority):
+            if key is not None and key is not column:
+                keys.append((key, False))
+        if column is not Todo.created_at:
+            keys.append((Todo.created_at, True))
+        keys.append((Todo.id, True))
+        return keys
+
+    @staticmethod
+    def _keyset_after(keys, cursor):
+        """键集分页条件：排在游标（各排序键的取值）之后的行
+
+        SQLite 升序时 NULL 在最前，降序时 NULL 在最后
+        """
+        if len(cursor) != len(keys):
+            raise ValueError("分页游标与排序方式不匹配")
+
+        conditions = []
+        equal = []
+        for (key, descending), value in zip(keys, cursor):
+            if value is not None:
+                if isinstance(key.type, DateTime) and isinstance(value, str):
+                    value = datetime.fromisoformat(value)
+                # 布尔值等需绑定为参数才能参与大小比较
+                value = literal(value, key.type)
+            if value is None:
+                after = None if descending else key != None
+            else:
+                after = or_(key < value, key == None) if descending else key > value
+            if after is not None:
+                conditions.append(and_(*equal, after))
+            equal.append(key == None if value is None else key == value)
+        return or_(*conditions) if conditions else literal(False)
+
+    def _filter_todos(self, query, keyword, category_id=None, tag_id=None, status=None,
+                      include_completed=True):
+        """应用搜索筛选条件，返回 (query, 相关度列)，未使用全文索引时相关度列为 None"""
+        rank = None
+
+        if status == "completed":
+            query = query.filter(Todo.completed == True)
+        elif status == "pending" or not include_completed:
+            query = query.filter(Todo.completed == False)
+
+        match = self._fulltext_query(keyword)
+        if match:
+            # 全文索引检索
+            hits = text(
+                f"SELECT rowid AS id, rank FROM {FULLTEXT_TABLE} "
+                f"WHERE {FULLTEXT_TABLE} MATCH :match"
+            ).bindparams(match=match).columns(id=Integer, rank=Float).subquery()
+            query = query.join(hits, hits.c.id == Todo.id)
+            rank = hits.c.rank
+        elif keyword:
+            query = query.filter(
+                or_(
+                    Todo.title.contains(keyword),
+                    Todo.description.contains(keyword)
+                )
+            )
+
+        if category_id:
+            query = query.filter(Todo.category_id == category_id)
+
+        if tag_id:
+            query = query.join(TodoTag, TodoTag.todo_id == Todo.id).filter(TodoTag.tag_id == tag_id)
+
+        return query, rank
+
+    def keyword_terms(self, keyword):
+        """搜索关键字的匹配规则：返回需要全部包含的子串列表
+
+        可以使用全文索引时每个词分别匹配，否则整个关键字作为一个子串（与 search_todos 一致）
+        """
+        if not keyword:
+            return []
+        if self._fulltext_query(keyword):
+            return keyword.split()
+        return [keyword]
+
+    def keyword_ranked(self, keyword):
+        """关键字是否使用全文索引检索（结果按相关度排序）"""
+        return self._fulltext_query(keyword) is not None
+
+    def _fulltext_query(self, keyword):
+        """将搜索关键字转换为 FTS5 短语查询，无法使用全文索引时返回None"""
+        if not self._fulltext or not keyword:
+            return None
+        terms = keyword.split()
+        if not terms or any(len(term) < FULLTEXT_MIN_LENGTH for term in terms):
+            return None
+        # 每个词作为短语（trigram 下即子串匹配），多个词之间为 AND
+        return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+    def get_todos_with_reminders(self):
+        """获取所有设置了提醒或循环提醒的未完成待办（用于调度）"""
         session = self.session
         try:
-            now = datetime.now()
-            today = date.today()
-
-            todos = session.query(Todo).options(
-                joinedload(Todo.category),
-                joinedload(Todo.tags)
-            ).filter(
+            return session.query(Todo).filter(
                 and_(
                     Todo.completed == False,
-                    Todo.is_recurring == True,
-                    Todo.recurring_time != None
+                    or_(
+                        Todo.reminder_time != None,
+                        and_(Todo.is_recurring == True, Todo.recurring_time != None)
+                    )
                 )
             ).all()
-
-            result = []
-            for todo in todos:
-                if todo.should_remind_today():
-                    # 检查时间是否已过
-                    from datetime import datetime as dt
-                    remind_dt = dt.combine(today, todo.recurring_time)
-                    if remind_dt <= now:
-                        result.append(todo)
-
-            return result
         finally:
             session.close()
 
     def create_todo(self, title, description="", priority=PRIORITY_MEDIUM,
                     category_id=None, reminder_time=None, tag_ids=None,
                     is_recurring=False, recurring_type=None, recurring_time=None,
-                    recurring_weekdays=None, exclude_holidays=False, holiday_list=None):
+                    recurring_weekdays=None, exclude_holidays=False, holiday_list=None,
+                    recurring_monthday=None):
         """创建待办"""
-        session = self.session
-        try:
+        def op(session):
             todo = Todo(
                 title=title,
                 description=description,
@@ -189,6 +778,7 @@ class Database:
                 is_recurring=is_recurring,
                 recurring_type=recurring_type,
                 recurring_time=recurring_time,
+                recurring_monthday=recurring_monthday,
                 exclude_holidays=exclude_holidays
             )
 
@@ -204,24 +794,32 @@ class Database:
 
             session.add(todo)
             session.flush()  # 刷新以获取ID
-            todo_id = todo.id
-            session.commit()
-            return todo_id
-        finally:
-            session.close()
+            if is_recurring:
+                self._refresh_occurrences(session, [todo.id])
+            return todo.id
+
+        return self._write(op, lambda todo_id: [todo_id])
 
-    def update_todo(self, todo_id, **kwargs):
+    def update_todo(self, todo_id, tag_ids=None, recurring_weekdays=None, **kwargs):
         """更新待办"""
-        session = self.session
-        try:
+        def op(session):
             todo = session.query(Todo).filter(Todo.id == todo_id).first()
             if todo:
+                # 表单每次都会提交提醒时间，只有实际修改时才确认已触发的提醒
+                reminder_changed = "reminder_time" in kwargs and kwargs["reminder_time"] != todo.reminder_time
                 for key, value in kwargs.items():
                     setattr(todo, key, value)
-                session.commit()
+                if tag_ids is not None:
+                    todo.tags = session.query(Tag).filter(Tag.id.in_(tag_ids)).all()
+                if recurring_weekdays is not None:
+                    todo.set_recurring_weekdays(recurring_weekdays)
+                if reminder_changed or kwargs.get("completed"):
+                    self._acknowledge_reminders(session, [todo_id])
+                if todo.is_recurring or recurring_weekdays is not None or self.RECURRENCE_FIELDS & kwargs.keys():
+                    self._refresh_occurrences(session, [todo_id])
             return todo
-        finally:
-            session.close()
+
+        return self._write(op, lambda todo: [todo_id] if todo else None, defer=True)
 
     def complete_todo(self, todo_id):
         """完成待办"""
@@ -232,38 +830,37 @@ class Database:
         return self.update_todo(todo_id, completed=False, completed_at=None)
 
     def delete_todo(self, todo_id):
-        """删除待办"""
-        session = self.session
-        try:
+        """删除待办，返回是否存在"""
+        def op(session):
             todo = session.query(Todo).filter(Todo.id == todo_id).first()
             if todo:
+                self._delete_occurrences(session, [todo_id])
                 session.delete(todo)
-                session.commit()
-        finally:
-            session.close()
+            return todo is not None
+
+        return self._write(op, lambda deleted: [todo_id] if deleted else None, defer=True)
 
     def batch_complete(self, todo_ids):
         """批量完成"""
-        session = self.session
-        try:
+        def op(session):
             session.query(Todo).filter(Todo.id.in_(todo_ids)).update(
                 {Todo.completed: True, Todo.completed_at: datetime.now()},
                 synchronize_session=False
             )
-            session.commit()
-        finally:
-            session.close()
+            self._acknowledge_reminders(session, todo_ids)
+            self._refresh_occurrences(session, todo_ids)
+
+        self._write(op, lambda _: todo_ids, defer=True)
 
     def batch_delete(self, todo_ids):
         """批量删除"""
-        session = self.session
-        try:
+        def op(session):
+            self._delete_occurrences(session, todo_ids)
             session.query(Todo).filter(Todo.id.in_(todo_ids)).delete(
                 synchronize_session=False
             )
-            session.commit()
-        finally:
-            session.close()
+
+        self._write(op, lambda _: todo_ids, defer=True)
 
     def snooze_reminder(self, todo_id, minutes):
         """稍后提醒"""
@@ -271,6 +868,464 @@ class Database:
         new_time = datetime.now() + timedelta(minutes=minutes)
         return self.update_todo(todo_id, reminder_time=new_time)
 
+    def batch_snooze(self, todo_ids, minutes):
+        """批量稍后提醒"""
+        from datetime import timedelta
+        new_time = datetime.now() + timedelta(minutes=minutes)
+
+        def op(session):
+            session.query(Todo).filter(Todo.id.in_(todo_ids)).update(
+                {Todo.reminder_time: new_time},
+                synchronize_session=False
+            )
+            self._acknowledge_reminders(session, todo_ids)
+
+        self._write(op, lambda _: todo_ids, defer=True)
+
+    # ========== 批量导入 ==========
+
+    def bulk_import(self, records, chunk_size=5000):
+        """批量导入待办，返回导入数量
+
+        records 为字典的可迭代对象（可以是生成器，按块消费），键与 Todo 字段一致，
+        另外 category 为分类名称、tags 为标签名称列表，不存在的分类和标签会自动创建。
+        每块一个事务，使用 executemany 插入待办及标签关联，全文索引按块写入。
+        """
+        categories = {cat.name: cat.id for cat in self.get_all_categories()}
+        tags = {}
+        for tag in self.get_all_tags():
+            tags.setdefault(tag.name, tag.id)
+
+        # 解析下一块的同时由写线程写入上一块
+        total = 0
+        pending = None
+        chunk = []
+        for record in records:
+            chunk.append(record)
+            if len(chunk) >= chunk_size:
+                total += self._wait_import(pending)
+                pending = self._import_chunk(chunk, categories, tags)
+                chunk = []
+        total += self._wait_import(pending)
+        if chunk:
+            total += self._wait_import(self._import_chunk(chunk, categories, tags))
+        return total
+
+    def _wait_import(self, pending):
+        """等待一块导入提交，返回导入数量"""
+        if pending is None:
+            return 0
+        try:
+            return len(pending.result())
+        finally:
+            self._writer.sync()
+
+    # 批量导入写入的待办列（顺序与 _import_chunk 中的元组一致）
+    IMPORT_COLUMNS = (
+        "id", "title", "description", "priority", "category_id", "reminder_time",
+        "created_at", "completed_at", "completed", "is_recurring", "recurring_type",
+        "recurring_time", "recurring_weekdays", "recurring_monthday", "exclude_holidays",
+        "holiday_json",
+    )
+
+    def _import_chunk(self, records, categories, tags):
+        """在一个事务中导入一块待办，返回提交结果的 Future"""
+        category_table = Category.__table__
+        tag_table = Tag.__table__
+        # 绕过 ORM/Core 的逐行参数处理直接 executemany，时间类型使用方言的转换函数保证存储格式一致
+        dialect = self._engine.dialect
+        to_datetime = Todo.created_at.type.dialect_impl(dialect).bind_processor(dialect)
+        to_time = Todo.recurring_time.type.dialect_impl(dialect).bind_processor(dialect)
+        insert_todos = "INSERT INTO todos ({}) VALUES ({})".format(
+            ", ".join(self.IMPORT_COLUMNS), ", ".join("?" * len(self.IMPORT_COLUMNS))
+        )
+
+        # 本块新建的分类/标签（名称 -> ID）：提交后才并入共享的名称映射，
+        # 整批回滚后重新执行时清空，避免使用已回滚事务中的ID
+        created = {"categories": {}, "tags": {}}
+
+        def resolve(session, names, table, table_ids, new_ids):
+            # 名称 -> ID，缺失的先查询（可能刚由其他写操作创建）再逐个创建（新名称通常很少）
+            ids = []
+            for name in names:
+                if name in table_ids:
+                    ids.append(table_ids[name])
+                    continue
+                if name not in new_ids:
+                    new_id = session.execute(
+                        select(table.c.id).where(table.c.name == name).order_by(table.c.id).limit(1)
+                    ).scalar()
+                    if new_id is None:
+                        new_id = session.execute(table.insert().values(name=name)).inserted_primary_key[0]
+                    new_ids[name] = new_id
+                ids.append(new_ids[name])
+            return ids
+
+        def op(session):
+            new_categories = created["categories"] = {}
+            new_tags = created["tags"] = {}
+            now = to_datetime(datetime.now())
+            first_id = (session.query(func.max(Todo.id)).scalar() or 0) + 1
+            todo_id = first_id
+            rows = []
+            links = []
+            for record in records:
+                category = record.get("category")
+                completed = bool(record.get("completed", False))
+                completed_at = record.get("completed_at")
+                rows.append((
+                    todo_id,
+                    record["title"],
+                    record.get("description") or "",
+                    record.get("priority") or PRIORITY_MEDIUM,
+                    (
+                        resolve(session, [category], category_table, categories, new_categories)[0]
+                        if category else record.get("category_id")
+                    ),
+                    to_datetime(record.get("reminder_time")),
+                    to_datetime(record.get("created_at")) or now,
+                    to_datetime(completed_at) if completed_at else (now if completed else None),
+                    completed,
+                    bool(record.get("is_recurring", False)),
+                    record.get("recurring_type"),
+                    to_time(record.get("recurring_time")),
+                    _json_list(record.get("recurring_weekdays")),
+                    record.get("recurring_monthday"),
+                    bool(record.get("exclude_holidays", False)),
+                    _json_list(record.get("holidays")),
+                ))
+                for tag_id in dict.fromkeys(resolve(session, record.get("tags") or [], tag_table, tags, new_tags)):
+                    links.append((todo_id, tag_id))
+                todo_id += 1
+
+            conn = session.connection()
+            if self._fulltext:
+                # 逐行触发器写全文索引很慢：本事务内先删除插入触发器，插入后按块写入索引再恢复
+                conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {FULLTEXT_INSERT_TRIGGER}")
+            conn.exec_driver_sql(insert_todos, rows)
+            if links:
+                conn.exec_driver_sql("INSERT INTO todo_tags (todo_id, tag_id) VALUES (?, ?)", links)
+            if self._fulltext:
+                conn.exec_driver_sql(
+                    f"INSERT INTO {FULLTEXT_TABLE}(rowid, title, description) "
+                    "SELECT id, title, description FROM todos WHERE id BETWEEN ? AND ?",
+                    (first_id, todo_id - 1)
+                )
+                conn.exec_driver_sql(FULLTEXT_INSERT_TRIGGER_DDL)
+            # 未完成的循环待办（元组下标见 IMPORT_COLUMNS：8 completed, 9 is_recurring）
+            recurring = [row[0] for row in rows if row[9] and not row[8]]
+            if recurring:
+                self._refresh_occurrences(session, recurring)
+            return list(range(first_id, todo_id))
+
+        def on_commit(todo_ids):
+            # 在写线程中执行，下一块的写操作一定在此之后
+            categories.update(created["categories"])
+            tags.update(created["tags"])
+            for kind in ("categories", "tags"):
+                if created[kind]:
+                    self._notify_lookup(kind)
+            self._notify(todo_ids)
+
+        # 不等待提交，返回 Future（写入失败时导入中止）
+        return self._writer.submit(op, wait=False, on_commit=on_commit)
+
+    # ========== 流式导出 ==========
+
+    # 可导出的列，与批量导入的记录格式一致（category、tags 为名称）
+    EXPORT_COLUMNS = (
+        "id", "title", "description", "priority", "category", "tags",
+        "reminder_time", "created_at", "completed_at", "completed",
+        "is_recurring", "recurring_type", "recurring_time", "recurring_weekdays",
+        "recurring_monthday", "exclude_holidays", "holidays",
+    )
+    _JSON_EXPORT_COLUMNS = ("tags", "recurring_weekdays", "holidays")
+
+    def iter_todos(self, columns=None, chunk_size=5000):
+        """按ID顺序流式遍历全部待办，逐条生成字典
+
+        不构建 ORM 对象，按 chunk_size 分批从游标读取，内存占用与总行数无关。
+        columns 为 EXPORT_COLUMNS 的子集，只查询需要的列。
+        整个遍历在同一个读事务中进行，结果是一致的快照。
+        """
+        columns = list(columns or self.EXPORT_COLUMNS)
+        unknown = [name for name in columns if name not in self.EXPORT_COLUMNS]
+        if unknown:
+            raise ValueError(f"未知的导出列: {', '.join(unknown)}")
+
+        tag_names = select(func.json_group_array(Tag.name)).select_from(TodoTag).join(
+            Tag, Tag.id == TodoTag.tag_id
+        ).where(TodoTag.todo_id == Todo.id).scalar_subquery()
+        expressions = {
+            "category": Category.name,
+            "tags": tag_names,
+            "holidays": Todo.holiday_json,
+        }
+        stmt = select(*[
+            expressions.get(name, getattr(Todo, name, None)).label(name) for name in columns
+        ]).select_from(Todo)
+        if "category" in columns:
+            stmt = stmt.outerjoin(Category, Category.id == Todo.category_id)
+        stmt = stmt.order_by(Todo.id)
+
+        json_columns = [name for name in columns if name in self._JSON_EXPORT_COLUMNS]
+        self._writer.sync()
+        with self._engine.connect() as conn:
+            result = conn.execution_options(yield_per=chunk_size).execute(stmt)
+            for row in result.mappings():
+                record = dict(row)
+                for name in json_columns:
+                    try:
+                        record[name] = json.loads(record[name] or "[]")
+                    except ValueError:
+                        record[name] = []
+                yield record
+
+    # ========== 原始行 ==========
+
+    def iter_todo_rows(self, todo_ids=None, chunk_size=5000):
+        """流式查询待办原始行（不构建 ORM 对象），todo_ids 为 None 时查询全部
+
+        每行为字典，包含 todos 表的全部列以及 tag_ids（标签ID列表）
+        """
+        stmt = select(*Todo.__table__.columns, self._tag_ids_column())
+        if todo_ids is not None:
+            stmt = stmt.where(Todo.id.in_(list(todo_ids)))
+
+        self._writer.sync()
+        with self._engine.connect() as conn:
+            result = conn.execution_options(yield_per=chunk_size).execute(stmt)
+            for row in result.mappings():
+                record = dict(row)
+                record["tag_ids"] = json.loads(record["tag_ids"] or "[]")
+                yield record
+
+    # ========== 提醒触发记录 ==========
+
+    def claim_reminders(self, occurrences, acknowledged=False):
+        """批量记录提醒已触发，返回其中首次触发的 [(待办ID, 提醒时间)]
+
+        occurrences 为 (待办ID, 提醒时间) 列表；acknowledged=True 时同时标记为已处理，
+        用于补发时被合并或超出上限、不再弹出的提醒
+        """
+        occurrences = list(occurrences)
+        if not occurrences:
+            return []
+
+        def op(session):
+            now = datetime.now()
+            claimed = []
+            for todo_id, due_time in occurrences:
+                stmt = sqlite_insert(ReminderOccurrence).values(
+                    todo_id=todo_id,
+                    due_time=due_time,
+                    fired_at=now,
+                    acknowledged_at=now if acknowledged else None
+                ).on_conflict_do_nothing(index_elements=["todo_id", "due_time"])
+                if session.execute(stmt).rowcount > 0:
+                    claimed.append((todo_id, due_time))
+            return claimed
+
+        return self._write(op)
+
+    def get_fired_reminder_times(self):
+        """获取当前单次提醒时间已触发过的待办 {待办ID: 提醒时间}"""
+        session = self.session
+        try:
+            rows = session.query(Todo.id, Todo.reminder_time).join(
+                ReminderOccurrence,
+                and_(
+                    ReminderOccurrence.todo_id == Todo.id,
+                    ReminderOccurrence.due_time == Todo.reminder_time
+                )
+            ).filter(Todo.completed == False).all()
+            return {todo_id: reminder_time for todo_id, reminder_time in rows}
+        finally:
+            session.close()
+
+    def get_missed_reminders(self, end):
+        """查询 end 及之前尚未触发的单次提醒（未完成的待办），返回按时间排序的 [(待办ID, 提醒时间)]"""
+        session = self.session
+        try:
+            fired = exists().where(
+                and_(
+                    ReminderOccurrence.todo_id == Todo.id,
+                    ReminderOccurrence.due_time == Todo.reminder_time
+                )
+            )
+            rows = session.query(Todo.id, Todo.reminder_time).filter(
+                Todo.completed == False,
+                Todo.reminder_time != None,
+                Todo.reminder_time <= end,
+                ~fired
+            ).order_by(Todo.reminder_time, Todo.id).all()
+            return [(todo_id, reminder_time) for todo_id, reminder_time in rows]
+        finally:
+            session.close()
+
+    def get_pending_reminders(self):
+        """获取已触发但尚未处理（完成/稍后提醒）的待办，用于重启后恢复弹窗"""
+        session = self.session
+        try:
+            pending = exists().where(
+                and_(
+                    ReminderOccurrence.todo_id == Todo.id,
+                    ReminderOccurrence.acknowledged_at == None
+                )
+            )
+            return session.query(Todo).options(
+                joinedload(Todo.category),
+                joinedload(Todo.tags)
+            ).filter(
+                and_(Todo.completed == False, pending)
+            ).order_by(Todo.reminder_time).all()
+        finally:
+            session.close()
+
+    def acknowledge_reminders(self, todo_ids):
+        """将待办已触发的提醒标记为已处理（不修改待办本身）"""
+        self._write(lambda session: self._acknowledge_reminders(session, todo_ids), defer=True)
+
+    def _acknowledge_reminders(self, session, todo_ids):
+        """将待办所有未处理的提醒标记为已处理"""
+        session.query(ReminderOccurrence).filter(
+            and_(
+                ReminderOccurrence.todo_id.in_(todo_ids),
+                ReminderOccurrence.acknowledged_at == None
+            )
+        ).update(
+            {ReminderOccurrence.acknowledged_at: datetime.now()},
+            synchronize_session=False
+        )
+
+    def _delete_occurrences(self, session, todo_ids):
+        """删除待办的提醒触发记录及循环提醒展开记录"""
+        session.query(ReminderOccurrence).filter(
+            ReminderOccurrence.todo_id.in_(todo_ids)
+        ).delete(synchronize_session=False)
+        session.query(RecurrenceOccurrence).filter(
+            RecurrenceOccurrence.todo_id.in_(todo_ids)
+        ).delete(synchronize_session=False)
+
+    # ========== 循环提醒展开 ==========
+
+    # 影响循环提醒时间的待办字段
+    RECURRENCE_FIELDS = frozenset((
+        "completed", "is_recurring", "recurring_type", "recurring_time", "recurring_monthday",
+        "exclude_holidays", "holiday_json", "created_at",
+    ))
+    _OCCURRENCES_UNTIL_KEY = "occurrences_until"
+
+    def get_occurrences_between(self, start, end):
+        """查询 (start, end] 内的循环提醒，返回按时间排序的 [(待办ID, 提醒时间)]
+
+        超出已展开范围时先展开；早于保留期（OCCURRENCE_RETENTION_DAYS 天）的记录已清理。
+        """
+        if self._occurrences_until is None or end > self._occurrences_until:
+            self.extend_occurrences(max(end, datetime.now() + timedelta(days=OCCURRENCE_HORIZON_DAYS)))
+
+        session = self.session
+        try:
+            rows = session.query(RecurrenceOccurrence.todo_id, RecurrenceOccurrence.due_time).filter(
+                and_(
+                    RecurrenceOccurrence.due_time > start,
+                    RecurrenceOccurrence.due_time <= end
+                )
+            ).order_by(RecurrenceOccurrence.due_time, RecurrenceOccurrence.todo_id).all()
+            return [(todo_id, due_time) for todo_id, due_time in rows]
+        finally:
+            session.close()
+
+    def extend_occurrences(self, until=None):
+        """把循环提醒展开到 until（默认当前时间之后 OCCURRENCE_HORIZON_DAYS 天），并清理过期记录
+
+        从上次的展开水位继续，首次展开从今天零点开始；返回新的展开水位。
+        """
+        now = datetime.now()
+        until = until or now + timedelta(days=OCCURRENCE_HORIZON_DAYS)
+
+        def op(session):
+            floor = now - timedelta(days=OCCURRENCE_RETENTION_DAYS)
+            session.query(RecurrenceOccurrence).filter(
+                RecurrenceOccurrence.due_time < floor
+            ).delete(synchronize_session=False)
+
+            watermark = self._occurrences_watermark(session)
+            if watermark is not None and watermark >= until:
+                return watermark
+
+            todos = session.query(Todo).filter(
+                and_(
+                    Todo.completed == False,
+                    Todo.is_recurring == True,
+                    Todo.recurring_time != None
+                )
+            ).all()
+            start = self._start_of_day(now) if watermark is None else max(watermark, floor)
+            self._materialize_occurrences(session, todos, start, until)
+            session.merge(AppState(key=self._OCCURRENCES_UNTIL_KEY, value=until.isoformat()))
+            return until
+
+        self._occurrences_until = self._write(op)
+        return self._occurrences_until
+
+    def _occurrences_watermark(self, session):
+        """读取循环提醒的展开水位，尚未展开时返回None"""
+        state = session.get(AppState, self._OCCURRENCES_UNTIL_KEY)
+        return datetime.fromisoformat(state.value) if state and state.value else None
+
+    def _refresh_occurrences(self, session, todo_ids, calendar=None):
+        """在写事务中按当前规则重新展开指定待办从现在到展开水位的循环提醒
+
+        已过去的展开记录保留（补发错过的提醒时使用），只替换尚未到期的。
+        calendar: (假期序数集合, 调休上班日序数集合)，默认使用假期日历（假期本身在本事务中变更时传入）
+        """
+        start = datetime.now()
+        session.query(RecurrenceOccurrence).filter(
+            and_(
+                RecurrenceOccurrence.todo_id.in_(todo_ids),
+                RecurrenceOccurrence.due_time >= start
+            )
+        ).delete(synchronize_session=False)
+
+        until = self._occurrences_watermark(session)
+        if until is None or until <= start:
+            return  # 尚未展开，下次展开时一并计算
+        todos = session.query(Todo).filter(
+            and_(Todo.id.in_(todo_ids), Todo.is_recurring == True)
+        ).all()
+        self._materialize_occurrences(session, todos, start, until, calendar)
+
+    def _refresh_holiday_occurrences(self, session):
+        """假期变更后在同一事务中重新展开排除假期的循环待办，返回这些待办的ID"""
+        session.flush()
+        calendar = HolidayCalendar.split(session.query(Holiday.date, Holiday.is_workday))
+        todo_ids = [todo_id for todo_id, in session.query(Todo.id).filter(
+            and_(
+                Todo.completed == False,
+                Todo.is_recurring == True,
+                Todo.exclude_holidays == True
+            )
+        )]
+        if todo_ids:
+            self._refresh_occurrences(session, todo_ids, calendar)
+        return todo_ids
+
+    @staticmethod
+    def _start_of_day(moment):
+        return datetime.combine(moment.date(), datetime.min.time())
+
+    @staticmethod
+    def _materialize_occurrences(session, todos, start, end, calendar=None):
+        """写入待办在 [start, end] 内的循环提醒（已存在的跳过）"""
+        rows = []
+        for todo in todos:
+            rule = RecurrenceRule.from_todo(todo, calendar)
+            if rule:
+                rows.extend({"todo_id": todo.id, "due_time": due} for due in rule.occurrences(start, end))
+        if rows:
+            session.execute(sqlite_insert(RecurrenceOccurrence).on_conflict_do_nothing(), rows)
+
     # ========== Category 操作 ==========
 
     def get_all_categories(self):
@@ -283,25 +1338,21 @@ class Database:
 
     def create_category(self, name, color="#4A90D9"):
         """创建分类"""
-        session = self.session
-        try:
+        def op(session):
             cat = Category(name=name, color=color)
             session.add(cat)
-            session.commit()
             return cat
-        finally:
-            session.close()
+
+        return self._write(op, lookup="categories")
 
     def delete_category(self, category_id):
         """删除分类"""
-        session = self.session
-        try:
+        def op(session):
             cat = session.query(Category).filter(Category.id == category_id).first()
             if cat:
                 session.delete(cat)
-                session.commit()
-        finally:
-            session.close()
+
+        self._write(op, defer=True, lookup="categories")
 
     # ========== Tag 操作 ==========
 
@@ -315,37 +1366,31 @@ class Database:
 
     def create_tag(self, name):
         """创建标签"""
-        session = self.session
-        try:
+        def op(session):
             tag = Tag(name=name)
             session.add(tag)
-            session.commit()
             return tag
-        finally:
-            session.close()
+
+        return self._write(op, lookup="tags")
 
     def update_tag(self, tag_id, name):
         """更新标签"""
-        session = self.session
-        try:
+        def op(session):
             tag = session.query(Tag).filter(Tag.id == tag_id).first()
             if tag:
                 tag.name = name
-                session.commit()
             return tag
-        finally:
-            session.close()
+
+        return self._write(op, lookup="tags")
 
     def delete_tag(self, tag_id):
         """删除标签"""
-        session = self.session
-        try:
+        def op(session):
             tag = session.query(Tag).filter(Tag.id == tag_id).first()
             if tag:
                 session.delete(tag)
-                session.commit()
-        finally:
-            session.close()
+
+        self._write(op, defer=True, lookup="tags")
 
     # ========== Holiday 操作 ==========
 
@@ -357,36 +1402,136 @@ class Database:
         finally:
             session.close()
 
-    def add_holiday(self, holiday_date, name=""):
-        """添加假期"""
-        session = self.session
-        try:
-            holiday = Holiday(date=holiday_date, name=name)
+    def add_holiday(self, holiday_date, name="", is_workday=False):
+        """添加假期（is_workday=True 为调休上班日）"""
+        def op(session):
+            holiday = Holiday(date=holiday_date, name=name, is_workday=is_workday)
             session.add(holiday)
-            session.commit()
-            return holiday
-        finally:
-            session.close()
+            return holiday, self._refresh_holiday_occurrences(session)
+
+        # 排除假期的循环待办提醒时间随之变化，一并通知
+        holiday, _ = self._write(op, lambda result: result[1], lookup="holidays")
+        return holiday
 
     def remove_holiday(self, holiday_id):
         """删除假期"""
-        session = self.session
-        try:
+        def op(session):
             holiday = session.query(Holiday).filter(Holiday.id == holiday_id).first()
-            if holiday:
-                session.delete(holiday)
-                session.commit()
-        finally:
-            session.close()
+            if not holiday:
+                return []
+            session.delete(holiday)
+            return self._refresh_holiday_occurrences(session)
+
+        self._write(op, lambda todo_ids: todo_ids, defer=True, lookup="holidays")
+
+    def import_holidays(self, entries, replace=False, dry_run=False):
+        """批量导入假期及调休上班日，在一个事务中按日期插入或更新，返回差异
+
+        entries: (日期, 名称, 是否调休上班) 的可迭代对象，同一日期以最后一条为准
+        replace=True 时删除导入数据所在年份中本次未包含的日期；dry_run=True 时只计算差异不写入
+        返回 {"added": [条目], "updated": [(旧条目, 新条目)], "removed": [条目], "unchanged": 数量}，
+        条目为 (日期, 名称, 是否调休上班)
+        """
+        incoming = {}
+        for day, name, is_workday in entries:
+            incoming[day] = (day, name or "", bool(is_workday))
+
+        def diff(session):
+            result = {"added": [], "updated": [], "removed": [], "unchanged": 0}
+            if not incoming:
+                return result
+            years = {day.year for day in incoming}
+            first = min(min(incoming), date(min(years), 1, 1)) if replace else min(incoming)
+            last = max(max(incoming), date(max(years), 12, 31)) if replace else max(incoming)
+            existing = {
+                holiday.date: (holiday.date, holiday.name or "", bool(holiday.is_workday))
+                for holiday in session.query(Holiday).filter(Holiday.date.between(first, last))
+            }
+            for day, entry in sorted(incoming.items()):
+                old = existing.get(day)
+                if old is None:
+                    result["added"].append(entry)
+                elif old != entry:
+                    result["updated"].append((old, entry))
+                else:
+                    result["unchanged"] += 1
+            if replace:
+                result["removed"] = [
+                    entry for day, entry in sorted(existing.items())
+                    if day not in incoming and day.year in years
+                ]
+            return result
+
+        if dry_run:
+            session = self.session
+            try:
+                return diff(session)
+            finally:
+                session.close()
+
+        def op(session):
+            result = diff(session)
+            rows = [
+                {"date": day, "name": name, "is_workday": is_workday}
+                for day, name, is_workday in result["added"] + [new for _, new in result["updated"]]
+            ]
+            if rows:
+                stmt = sqlite_insert(Holiday.__table__)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[Holiday.__table__.c.date],
+                    set_={"name": stmt.excluded.name, "is_workday": stmt.excluded.is_workday}
+                )
+                session.execute(stmt, rows)
+            if result["removed"]:
+                session.query(Holiday).filter(
+                    Holiday.date.in_([entry[0] for entry in result["removed"]])
+                ).delete(synchronize_session=False)
+            todo_ids = self._refresh_holiday_occurrences(session) if rows or result["removed"] else []
+            return result, todo_ids
+
+        result, _ = self._write(op, lambda result: result[1], lookup="holidays")
+        return result
 
     def is_holiday(self, check_date):
-        """检查是否是假期"""
+        """检查是否是假期（查询假期日历，不访问数据库）"""
+        return holiday_calendar.is_holiday(check_date)
+
+    # ========== 应用状态 ==========
+
+    def get_state(self, key, default=None):
+        """读取应用状态值"""
         session = self.session
         try:
-            return session.query(Holiday).filter(Holiday.date == check_date).first() is not None
+            state = session.get(AppState, key)
+            return state.value if state else default
         finally:
             session.close()
 
+    def set_state(self, key, value):
+        """保存应用状态值"""
+        self._write(lambda session: session.merge(AppState(key=key, value=value)), defer=True)
+
+    # ========== 维护 ==========
+
+    def run_maintenance(self, idle_seconds=60):
+        """空闲维护：更新查询统计信息并将 WAL 回写到数据库文件
+
+        最近 idle_seconds 秒内有写操作时跳过，返回是否执行了维护
+        """
+        if (datetime.now() - self._last_write).total_seconds() < idle_seconds:
+            return False
+        before = self._data_version()
+        with self._engine.connect() as conn:
+            conn.exec_driver_sql("PRAGMA optimize")
+            conn.exec_driver_sql("PRAGMA wal_checkpoint(PASSIVE)")
+            conn.commit()
+        after = self._data_version()
+        with self._watch_lock:
+            # PRAGMA optimize 可能更新统计表，不算其他进程的写入
+            if after != before and self._checked[0] == before:
+                self._checked = (after,) + self._checked[1:]
+        return True
+
     # ========== 统计 ==========
 
     def get_stats(self):
@@ -0,0 +1,126 @@
+"""数据导出 - 流式导出待办到 JSON Lines / CSV / Parquet
+
+用法: python main.py export 文件路径 [--format jsonl|csv|parquet] [--columns title,priority,...]
+
+导出的记录格式与批量导入（app/importer.py）一致，导出文件可以直接重新导入。
+Parquet 需要安装 pyarrow。
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from datetime import date, datetime, time as dt_time
+
+FORMATS = ("jsonl", "csv", "parquet")
+
+
+def _plain(value):
+    """转换为 JSON/CSV 可写入的值"""
+    if isinstance(value, (datetime, date, dt_time)):
+        return value.isoformat()
+    return value
+
+
+def write_jsonl(records, f):
+    """逐条写入 JSON Lines，返回写入数量"""
+    count = 0
+    for record in records:
+        f.write(json.dumps({key: _plain(value) for key, value in record.items()}, ensure_ascii=False))
+        f.write("\n")
+        count += 1
+    return count
+
+
+def write_csv(records, f, columns):
+    """逐条写入 CSV（列表字段用逗号连接，布尔值写为 1/0），返回写入数量"""
+    writer = csv.writer(f)
+    writer.writerow(columns)
+    count = 0
+    for record in records:
+        row = []
+        for name in columns:
+            value = record[name]
+            if isinstance(value, list):
+                value = ",".join(str(item) for item in value)
+            elif isinstance(value, bool):
+                value = int(value)
+            row.append("" if value is None else _plain(value))
+        writer.writerow(row)
+        count += 1
+    return count
+
+
+def write_parquet(records, path, columns, batch_size=50000):
+    """按批写入 Parquet（每批一个 row group），返回写入数量"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("导出 Parquet 需要安装 pyarrow")
+
+    types = {
+        "id": pa.int64(), "priority": pa.int64(), "recurring_monthday": pa.int64(),
+        "title": pa.string(), "description": pa.string(), "category": pa.string(),
+        "recurring_type": pa.string(),
+        "reminder_time": pa.timestamp("us"), "created_at": pa.timestamp("us"),
+        "completed_at": pa.timestamp("us"), "recurring_time": pa.time64("us"),
+        "completed": pa.bool_(), "is_recurring": pa.bool_(), "exclude_holidays": pa.bool_(),
+        "tags": pa.list_(pa.string()), "holidays": pa.list_(pa.string()),
+        "recurring_weekdays": pa.list_(pa.int64()),
+    }
+    schema = pa.schema([(name, types[name]) for name in columns])
+
+    count = 0
+    batch = {name: [] for name in columns}
+    with pq.ParquetWriter(path, schema) as writer:
+        for record in records:
+            for name in columns:
+                batch[name].append(record[name])
+            count += 1
+            if count % batch_size == 0:
+                writer.write_table(pa.table(batch, schema=schema))
+                batch = {name: [] for name in columns}
+        if count % batch_size:
+            writer.write_table(pa.table(batch, schema=schema))
+    return count
+
+
+def export_todos(path, fmt=None, columns=None, chunk_size=5000):
+    """导出全部待办到文件，返回导出数量"""
+    from .database import db
+
+    if fmt is None:
+        ext = os.path.splitext(path)[1].lower().lstrip(".")
+        fmt = ext if ext in FORMATS else "jsonl"
+    columns = list(columns or db.EXPORT_COLUMNS)
+    records = db.iter_todos(columns, chunk_size=chunk_size)
+
+    if fmt == "parquet":
+        return write_parquet(records, path, columns)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            return write_csv(records, f, columns)
+        return write_jsonl(records, f)
+
+
+def main(argv=None):
+    """命令行入口，返回退出码"""
+    parser = argparse.ArgumentParser(prog="main.py export", description="导出待办")
+    parser.add_argument("path", help="输出文件")
+    parser.add_argument("--format", choices=FORMATS, help="文件格式（默认按扩展名判断）")
+    parser.add_argument("--columns", help="导出的列，逗号分隔（默认全部）")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="每批从数据库读取的条数")
+    args = parser.parse_args(argv)
+
+    columns = [name.strip() for name in args.columns.split(",")] if args.columns else None
+    start = time.perf_counter()
+    try:
+        count = export_todos(args.path, args.format, columns, args.chunk_size)
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"导出失败: {e}", file=sys.stderr)
+        return 1
+
+    print(f"已导出 {count} 条待办，用时 {time.perf_counter() - start:.1f} 秒")
+    return 0
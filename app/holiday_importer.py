@@ -0,0 +1,143 @@
+"""假期导入 - 从 ICS 日历或 CSV 文件导入法定假期及调休上班日
+
+用法: python main.py import-holidays 文件路径 [--format ics|csv] [--replace] [--dry-run]
+
+ICS：读取每个 VEVENT 的 DTSTART/DTEND（全天事件，DTEND 不含）和 SUMMARY，
+    标题中含"班"（如"春节补班"、"调休上班"）的为调休上班日，其余为假期；不展开 RRULE。
+CSV：需要表头，date 列必填（2025-01-01、2025/01/01 或 20250101），name 可选，
+    type 列为 休/假/holiday 或 班/workday（也可用 is_workday 列 1/0），默认为假期。
+"""
+import argparse
+import csv
+import os
+import sys
+from datetime import datetime, timedelta
+
+# 标题中含这些字的事件视为调休上班日
+WORKDAY_KEYWORDS = ("班",)
+WORKDAY_TYPES = ("班", "补班", "上班", "workday", "work", "1", "true", "yes", "是")
+
+
+def _parse_date(value):
+    """解析日期（ISO、斜杠分隔或 YYYYMMDD，忽略时间部分）"""
+    value = value.strip()
+    for fmt, length in (("%Y%m%d", 8), ("%Y-%m-%d", 10), ("%Y/%m/%d", 10)):
+        try:
+            return datetime.strptime(value[:length], fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"无法识别的日期: {value}")
+
+
+def _unescape(text):
+    return text.replace("\\n", " ").replace("\\N", " ").replace("\\,", ",").replace("\\;", ";").replace("\\\\", "\\")
+
+
+def _unfold(lines):
+    """合并 ICS 折行（以空格或制表符开头的行接续上一行）"""
+    current = None
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current is not None:
+        yield current
+
+
+def read_ics(lines):
+    """解析 ICS 文本行，生成 (日期, 名称, 是否调休上班)"""
+    event = None
+    for line in _unfold(lines):
+        if line == "BEGIN:VEVENT":
+            event = {}
+            continue
+        if line == "END:VEVENT":
+            if event and "DTSTART" in event:
+                yield from _event_days(event)
+            event = None
+            continue
+        if event is None or ":" not in line:
+            continue
+        key, _, value = line.partition(":")
+        name, _, params = key.partition(";")
+        event[name.upper()] = (value, params.upper())
+
+
+def _event_days(event):
+    """全天事件覆盖的每一天"""
+    start_value, _ = event["DTSTART"]
+    start = _parse_date(start_value)
+    end = start + timedelta(days=1)
+    if "DTEND" in event:
+        end_value, _ = event["DTEND"]
+        # 全天事件的 DTEND 不含；带时间的事件只取开始日期
+        if "T" not in end_value:
+            end = max(_parse_date(end_value), end)
+
+    summary = _unescape(event.get("SUMMARY", ("", ""))[0]).strip()
+    is_workday = any(keyword in summary for keyword in WORKDAY_KEYWORDS)
+    day = start
+    while day < end:
+        yield day, summary, is_workday
+        day += timedelta(days=1)
+
+
+def read_csv(lines):
+    """解析 CSV 文本行，生成 (日期, 名称, 是否调休上班)"""
+    reader = csv.DictReader(lines)
+    if not reader.fieldnames or "date" not in [name.strip().lower() for name in reader.fieldnames]:
+        raise ValueError("CSV 需要包含 date 列的表头")
+    for row in reader:
+        row = {(key or "").strip().lower(): (value or "").strip() for key, value in row.items()}
+        if not row.get("date"):
+            continue
+        kind = (row.get("type") or row.get("is_workday") or "").lower()
+        yield _parse_date(row["date"]), row.get("name", ""), kind in WORKDAY_TYPES
+
+
+def read_entries(path, fmt=None):
+    """读取假期文件，返回 (日期, 名称, 是否调休上班) 列表"""
+    if fmt is None:
+        fmt = "ics" if os.path.splitext(path)[1].lower() in (".ics", ".ical") else "csv"
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        return list(read_ics(f) if fmt == "ics" else read_csv(f))
+
+
+def _describe(entry):
+    day, name, is_workday = entry
+    return f"{day.isoformat()} {'班' if is_workday else '休'} {name}".rstrip()
+
+
+def main(argv=None):
+    """命令行入口，返回退出码"""
+    parser = argparse.ArgumentParser(prog="main.py import-holidays", description="导入假期及调休上班日")
+    parser.add_argument("path", help="ICS 或 CSV 文件")
+    parser.add_argument("--format", choices=["ics", "csv"], help="文件格式（默认按扩展名判断）")
+    parser.add_argument("--replace", action="store_true", help="删除文件所含年份中未出现在文件里的日期")
+    parser.add_argument("--dry-run", action="store_true", help="只显示差异，不写入")
+    args = parser.parse_args(argv)
+
+    try:
+        entries = read_entries(args.path, args.format)
+    except (OSError, ValueError) as e:
+        print(f"读取失败: {e}", file=sys.stderr)
+        return 1
+
+    from .database import db
+
+    diff = db.import_holidays(entries, replace=args.replace, dry_run=args.dry_run)
+    for entry in diff["added"]:
+        print(f"+ {_describe(entry)}")
+    for old, new in diff["updated"]:
+        print(f"~ {_describe(old)} -> {_describe(new)}")
+    for entry in diff["removed"]:
+        print(f"- {_describe(entry)}")
+    print(
+        f"{'预览' if args.dry_run else '已导入'}: 新增 {len(diff['added'])}，更新 {len(diff['updated'])}，"
+        f"删除 {len(diff['removed'])}，未变 {diff['unchanged']}"
+    )
+    return 0
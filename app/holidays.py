@@ -0,0 +1,160 @@
+"""假期日历 - 进程内共享的假期及调休上班日集合
+
+假期表只在首次使用时读取一次，转换为按日期序数（date.toordinal()）的集合，
+之后判断某天是否为假期/工作日不再查询数据库；假期变更后由数据库通知失效并在下次使用时重新读取。
+"""
+import bisect
+import threading
+from datetime import date, timedelta
+
+
+def _to_ordinal(day):
+    return day if isinstance(day, int) else day.toordinal()
+
+
+def _is_weekend(ordinal):
+    # 序数 1 为 0001-01-01（周一）
+    return (ordinal - 1) % 7 >= 5
+
+
+def _weekdays_before(ordinal):
+    """序数 1 到 ordinal（不含）之间的周一至周五天数"""
+    weeks, rest = divmod(ordinal - 1, 7)
+    return weeks * 5 + min(rest, 5)
+
+
+def _slice(ordinals, first, last):
+    """已排序序数中位于 [first, last] 的部分"""
+    return ordinals[bisect.bisect_left(ordinals, first):bisect.bisect_right(ordinals, last)]
+
+
+class HolidayCalendar:
+    """假期日历"""
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if not hasattr(self, '_initialized'):
+            self._initialized = True
+            self._lock = threading.Lock()
+            self._ordinals = None  # 假期序数集合，None 表示需要重新读取
+            self._workdays = frozenset()  # 调休上班日序数集合
+            self._sorted = ()  # 排序后的假期序数，用于范围查询
+            self._sorted_workdays = ()
+            self._generation = 0  # 每次失效递增，丢弃失效前开始的读取结果
+            self._listening = False
+
+    # ========== 加载 ==========
+
+    @staticmethod
+    def to_ordinals(dates):
+        """日期列表（date 或 ISO 字符串）转换为序数集合，无法解析的忽略"""
+        ordinals = set()
+        for value in dates or ():
+            try:
+                day = value if isinstance(value, date) else date.fromisoformat(value)
+            except (TypeError, ValueError):
+                continue
+            ordinals.add(day.toordinal())
+        return frozenset(ordinals)
+
+    @staticmethod
+    def split(rows):
+        """(日期, 是否调休上班) 列表拆分为 (假期序数集合, 调休上班日序数集合)"""
+        holidays = set()
+        workdays = set()
+        for day, is_workday in rows:
+            (workdays if is_workday else holidays).add(day.toordinal())
+        return frozenset(holidays), frozenset(workdays)
+
+    def _load(self):
+        """从假期表读取"""
+        from .database import db
+
+        if not self._listening:
+            self._listening = True
+            db.add_lookup_listener(self._on_lookup_changed)
+
+        generation = self._generation
+        holidays, workdays = self.split(
+            (holiday.date, holiday.is_workday) for holiday in db.get_all_holidays()
+        )
+        with self._lock:
+            if generation == self._generation:
+                self._ordinals = holidays
+                self._workdays = workdays
+                self._sorted = tuple(sorted(holidays))
+                self._sorted_workdays = tuple(sorted(workdays))
+        return holidays
+
+    def invalidate(self):
+        """假期已变更，下次使用时重新读取"""
+        with self._lock:
+            self._generation += 1
+            self._ordinals = None
+
+    def _on_lookup_changed(self, kind):
+        if kind == "holidays":
+            self.invalidate()
+
+    @property
+    def ordinals(self):
+        """全部假期的序数集合（frozenset，可直接共享）"""
+        ordinals = self._ordinals
+        return ordinals if ordinals is not None else self._load()
+
+    @property
+    def workday_ordinals(self):
+        """全部调休上班日的序数集合"""
+        if self._ordinals is None:
+            self._load()
+        return self._workdays
+
+    # ========== 查询 ==========
+
+    def is_holiday(self, day):
+        """指定日期是否是假期"""
+        return _to_ordinal(day) in self.ordinals
+
+    def is_workday(self, day):
+        """指定日期是否是工作日（周一至周五或调休上班日，且不是假期）"""
+        ordinal = _to_ordinal(day)
+        if ordinal in self.ordinals:
+            return False
+        return not _is_weekend(ordinal) or ordinal in self._workdays
+
+    def holidays_between(self, start, end):
+        """[start, end] 范围内的假期日期列表"""
+        self.ordinals  # 确保已加载
+        ordinals = _slice(self._sorted, _to_ordinal(start), _to_ordinal(end))
+        return [date.fromordinal(ordinal) for ordinal in ordinals]
+
+    def count_workdays(self, start, end):
+        """[start, end] 范围内的工作日数量（不逐日遍历）"""
+        first, last = _to_ordinal(start), _to_ordinal(end)
+        if last < first:
+            return 0
+        self.ordinals  # 确保已加载
+        weekdays = _weekdays_before(last + 1) - _weekdays_before(first)
+        holidays = sum(1 for ordinal in _slice(self._sorted, first, last) if not _is_weekend(ordinal))
+        makeup = sum(1 for ordinal in _slice(self._sorted_workdays, first, last) if _is_weekend(ordinal))
+        return weekdays - holidays + makeup
+
+    def workdays_between(self, start, end):
+        """[start, end] 范围内的工作日日期列表"""
+        result = []
+        day = start
+        while day <= end:
+            if self.is_workday(day):
+                result.append(day)
+            day += timedelta(days=1)
+        return result
+
+
+# 全局假期日历实例
+holiday_calendar = HolidayCalendar()
@@ -0,0 +1,136 @@
+"""数据导入 - 从 JSON Lines / CSV 文件批量导入待办
+
+用法: python main.py import 文件路径 [--format jsonl|csv] [--chunk-size 5000]
+
+每行（每条记录）的字段：
+    title（必填）, description, priority（1/2/3 或 高/中/低）, category（分类名称）,
+    tags（标签名称列表，CSV 中用逗号分隔）, reminder_time, created_at, completed_at（ISO 格式时间）,
+    completed, is_recurring, exclude_holidays（true/false、1/0、是/否）,
+    recurring_type（daily/weekly/monthly）, recurring_time（HH:MM）, recurring_weekdays（0-6 列表）,
+    recurring_monthday（1-31）, holidays
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from datetime import datetime, time as dt_time
+
+from .models import PRIORITY_MAP
+
+PRIORITY_NAMES = {
+    "high": 1, "medium": 2, "low": 3,
+    **{text: value for value, text in PRIORITY_MAP.items()},
+}
+
+TRUE_VALUES = {"1", "true", "yes", "y", "是"}
+
+
+def _as_bool(value):
+    if isinstance(value, str):
+        return value.strip().lower() in TRUE_VALUES
+    return bool(value)
+
+
+def _as_list(value):
+    """列表或逗号分隔的字符串"""
+    if value is None or value == "":
+        return []
+    if isinstance(value, str):
+        return [item.strip() for item in value.split(",") if item.strip()]
+    return list(value)
+
+
+def _as_datetime(value):
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
+
+def _as_time(value):
+    if not value:
+        return None
+    if isinstance(value, dt_time):
+        return value
+    return dt_time.fromisoformat(value)
+
+
+def _as_priority(value):
+    if value is None or value == "":
+        return None
+    if isinstance(value, str) and not value.strip().isdigit():
+        return PRIORITY_NAMES[value.strip().lower()]
+    return int(value)
+
+
+def parse_record(raw):
+    """将一条原始记录（JSON 对象或 CSV 行）转换为 Database.bulk_import 的记录格式"""
+    title = (raw.get("title") or "").strip()
+    if not title:
+        raise ValueError("缺少 title")
+
+    return {
+        "title": title,
+        "description": raw.get("description") or "",
+        "priority": _as_priority(raw.get("priority")),
+        "category": raw.get("category") or None,
+        "tags": _as_list(raw.get("tags")),
+        "reminder_time": _as_datetime(raw.get("reminder_time")),
+        "created_at": _as_datetime(raw.get("created_at")),
+        "completed_at": _as_datetime(raw.get("completed_at")),
+        "completed": _as_bool(raw.get("completed", False)),
+        "is_recurring": _as_bool(raw.get("is_recurring", False)),
+        "recurring_type": raw.get("recurring_type") or None,
+        "recurring_time": _as_time(raw.get("recurring_time")),
+        "recurring_weekdays": [int(day) for day in _as_list(raw.get("recurring_weekdays"))],
+        "recurring_monthday": int(raw["recurring_monthday"]) if raw.get("recurring_monthday") else None,
+        "exclude_holidays": _as_bool(raw.get("exclude_holidays", False)),
+        "holidays": _as_list(raw.get("holidays")),
+    }
+
+
+def read_records(path, fmt=None):
+    """逐行读取文件并生成导入记录（不会一次性载入整个文件）"""
+    if fmt is None:
+        fmt = "csv" if os.path.splitext(path)[1].lower() == ".csv" else "jsonl"
+
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        if fmt == "csv":
+            rows = enumerate(csv.DictReader(f), start=2)
+        else:
+            rows = ((number, line) for number, line in enumerate(f, start=1) if line.strip())
+
+        for number, raw in rows:
+            try:
+                if fmt != "csv":
+                    raw = json.loads(raw)
+                    if not isinstance(raw, dict):
+                        raise ValueError("每行应为 JSON 对象")
+                record = parse_record(raw)
+            except (ValueError, KeyError, TypeError) as e:
+                raise ValueError(f"第 {number} 行格式错误: {e}") from e
+            yield record
+
+
+def main(argv=None):
+    """命令行入口，返回退出码"""
+    parser = argparse.ArgumentParser(prog="main.py import", description="批量导入待办")
+    parser.add_argument("path", help="JSON Lines 或 CSV 文件")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="文件格式（默认按扩展名判断）")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="每个事务导入的条数")
+    args = parser.parse_args(argv)
+
+    from .database import db
+
+    start = time.perf_counter()
+    try:
+        count = db.bulk_import(read_records(args.path, args.format), chunk_size=args.chunk_size)
+    except (OSError, ValueError) as e:
+        print(f"导入失败: {e}", file=sys.stderr)
+        return 1
+
+    print(f"已导入 {count} 条待办，用时 {time.perf_counter() - start:.1f} 秒")
+    return 0
@@ -1,8 +1,8 @@
 """数据库模型定义"""
-from datetime import datetime, time, date
-from sqlalchemy import create_engine, Column, Integer, String, Text, Boolean, DateTime, Time, ForeignKey, Date
+from datetime import datetime, time, date, timedelta
+from sqlalchemy import create_engine, event, Column, Integer, String, Text, Boolean, DateTime, Time, ForeignKey, Date, UniqueConstraint, Index
 from sqlalchemy.orm import declarative_base, relationship, sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import QueuePool
 
 Base = declarative_base()
 
@@ -83,11 +83,12 @@ class Todo(Base):
 
     # 循环提醒字段
     is_recurring = Column(Boolean, default=False)
-    recurring_type = Column(String(20), nullable=True)  # daily, weekly
+    recurring_type = Column(String(20), nullable=True)  # daily, weekly, monthly
     recurring_time = Column(Time, nullable=True)
     recurring_weekdays = Column(Text, default="[]")  # JSON格式的周几 [0-6]
+    recurring_monthday = Column(Integer, nullable=True)  # 每月几号 [1-31]，为空时取创建日期
     exclude_holidays = Column(Boolean, default=False)
-    holiday_json = Column(Text, default="[]")  # JSON格式的假期日期列表
+    holiday_json = Column(Text, default="[]")  # JSON格式的额外排除日期（假期以假期日历为准）
 
     # 关系
     category = relationship("Category", back_populates="todos")
@@ -133,45 +134,70 @@ class Todo(Base):
 
     def should_remind_today(self):
         """检查今天是否应该提醒（考虑循环和假期）"""
-        if self.completed:
-            return False
+        return self.should_remind_on(date.today())
 
-        if not self.is_recurring or not self.recurring_time:
-            return False
+    def recurrence_rule(self):
+        """解析循环规则，非循环或已完成时返回None"""
+        from .recurrence import RecurrenceRule
+        return RecurrenceRule.from_todo(self)
+
+    def should_remind_on(self, today):
+        """检查指定日期是否应该提醒（考虑循环和假期）"""
+        rule = self.recurrence_rule()
+        return rule is not None and rule.occurs_on(today)
+
+    def next_recurring_time(self, after, max_days=366):
+        """获取 after 之后的下一次循环提醒时间，没有则返回None"""
+        rule = self.recurrence_rule()
+        return rule.next_after(after, max_days) if rule else None
+
+
+class ReminderOccurrence(Base):
+    """提醒触发记录表 - 每次提醒（单次或循环的某一次）只触发一次"""
+    __tablename__ = 'reminder_occurrences'
+    __table_args__ = (
+        UniqueConstraint('todo_id', 'due_time', name='uq_occurrence_todo_due'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    todo_id = Column(Integer, ForeignKey('todos.id', ondelete='CASCADE'), nullable=False)
+    due_time = Column(DateTime, nullable=False)  # 本次提醒的计划时间
+    fired_at = Column(DateTime, default=datetime.now)  # 实际触发时间
+    acknowledged_at = Column(DateTime, nullable=True)  # 完成/稍后提醒的时间，为空表示弹窗未处理
+
+
+class RecurrenceOccurrence(Base):
+    """循环提醒展开表 - 预先计算的每一次循环提醒时间，按时间范围查询"""
+    __tablename__ = 'recurrence_occurrences'
+    __table_args__ = (
+        Index('ix_recurrence_occurrences_due', 'due_time'),
+    )
 
-        today = date.today()
+    todo_id = Column(Integer, ForeignKey('todos.id', ondelete='CASCADE'), primary_key=True)
+    due_time = Column(DateTime, primary_key=True)
 
-        # 检查周几（Python weekday()返回0-6，对应周一到周日）
-        # 用户界面存储的是0-6（周一=0）
-        if self.recurring_type == "weekly":
-            weekdays = self.get_recurring_weekdays()
-            if weekdays:
-                # Python weekday(): Monday=0, Sunday=6
-                # 存储的也是0-6
-                if today.weekday() not in weekdays:
-                    return False
 
-        # 检查是否是假期
-        if self.exclude_holidays:
-            holidays = self.get_holidays()
-            if today.isoformat() in holidays:
-                return False
+class AppState(Base):
+    """应用状态表 - 键值对（循环提醒展开水位等）"""
+    __tablename__ = 'app_state'
 
-        return True
+    key = Column(String(50), primary_key=True)
+    value = Column(Text, nullable=True)
 
 
 class Holiday(Base):
-    """假期配置表"""
+    """假期配置表（含调休上班日）"""
     __tablename__ = 'holidays'
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     date = Column(Date, nullable=False, unique=True)
     name = Column(String(100), nullable=True)
+    is_workday = Column(Boolean, nullable=False, default=False)  # 调休上班日（周末补班）
 
     @classmethod
     def is_holiday(cls, session, check_date):
-        """检查指定日期是否是假期"""
-        holiday = session.query(cls).filter(cls.date == check_date).first()
+        """检查指定日期是否是假期（不含调休上班日）"""
+        holiday = session.query(cls).filter(cls.date == check_date, cls.is_workday == False).first()
         return holiday is not None
 
 
@@ -182,12 +208,155 @@ def get_database_path():
     return os.path.join(base_dir, 'data', 'todo.db')
 
 
-def init_database():
-    """初始化数据库"""
+# 全文索引（FTS5 外部内容表，trigram 分词支持中文任意子串匹配，由触发器与 todos 表同步）
+FULLTEXT_TABLE = 'todos_fts'
+FULLTEXT_MIN_LENGTH = 3  # trigram 分词要求每个检索词至少3个字符
+
+# 插入触发器单独定义：批量导入时在事务内临时删除，改为按块写入全文索引
+FULLTEXT_INSERT_TRIGGER = 'todos_fts_ai'
+FULLTEXT_INSERT_TRIGGER_DDL = f"""CREATE TRIGGER IF NOT EXISTS {FULLTEXT_INSERT_TRIGGER} AFTER INSERT ON todos BEGIN
+        INSERT INTO {FULLTEXT_TABLE}(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END"""
+
+FULLTEXT_DDL = [
+    f"""CREATE VIRTUAL TABLE {FULLTEXT_TABLE} USING fts5(
+        title, description, content='todos', content_rowid='id', tokenize='trigram'
+    )""",
+    FULLTEXT_INSERT_TRIGGER_DDL,
+    f"""CREATE TRIGGER IF NOT EXISTS todos_fts_ad AFTER DELETE ON todos BEGIN
+        INSERT INTO {FULLTEXT_TABLE}({FULLTEXT_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS todos_fts_au AFTER UPDATE OF title, description ON todos BEGIN
+        INSERT INTO {FULLTEXT_TABLE}({FULLTEXT_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO {FULLTEXT_TABLE}(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END""",
+    f"INSERT INTO {FULLTEXT_TABLE}({FULLTEXT_TABLE}) VALUES ('rebuild')",
+]
+
+
+def init_fulltext_index(engine):
+    """创建全文索引（已存在则跳过），返回全文索引是否可用"""
+    with engine.connect() as conn:
+        exists = conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+            (FULLTEXT_TABLE,)
+        ).first()
+        if exists:
+            return True
+        try:
+            for ddl in FULLTEXT_DDL:
+                conn.exec_driver_sql(ddl)
+            conn.commit()
+            return True
+        except Exception:
+            # SQLite 版本过低（不支持 FTS5/trigram）时退回 LIKE 搜索
+            conn.rollback()
+            return False
+
+
+def _add_column(table, column, ddl):
+    """迁移步骤：新增列（新建的数据库已由 create_all 创建该列时跳过）"""
+    def step(conn):
+        columns = [row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({table})")]
+        if column not in columns:
+            conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+    return step
+
+
+# 数据库结构迁移：(版本号, [SQL语句或 callable(conn)])，按版本号顺序执行，
+# 当前版本记录在 PRAGMA user_version 中。create_all 不会修改已有的表，
+# 索引、新增列等变更都应在此追加新版本。
+MIGRATIONS = [
+    (1, [
+        # 提醒调度：未完成待办按提醒时间查找（部分索引）
+        "CREATE INDEX IF NOT EXISTS ix_todos_reminder_pending "
+        "ON todos (reminder_time) WHERE completed = 0",
+        # 循环提醒：未完成的循环待办
+        "CREATE INDEX IF NOT EXISTS ix_todos_recurring_pending "
+        "ON todos (recurring_time) WHERE completed = 0 AND is_recurring = 1",
+        # 状态筛选、统计及默认排序
+        "CREATE INDEX IF NOT EXISTS ix_todos_completed_priority "
+        "ON todos (completed, priority, created_at)",
+        # 分类筛选
+        "CREATE INDEX IF NOT EXISTS ix_todos_category ON todos (category_id)",
+        # 列表按列排序分页（SQLite 索引隐含 rowid，可直接用于 (列, id) 排序）
+        "CREATE INDEX IF NOT EXISTS ix_todos_priority ON todos (priority)",
+        "CREATE INDEX IF NOT EXISTS ix_todos_reminder_time ON todos (reminder_time)",
+        "CREATE INDEX IF NOT EXISTS ix_todos_created_at ON todos (created_at)",
+        # 按标签查找待办
+        "CREATE INDEX IF NOT EXISTS ix_todo_tags_tag ON todo_tags (tag_id, todo_id)",
+        "ANALYZE",
+    ]),
+    (2, [
+        # 每月循环提醒的日期
+        _add_column("todos", "recurring_monthday", "INTEGER"),
+    ]),
+    (3, [
+        # 调休上班日
+        _add_column("holidays", "is_workday", "BOOLEAN NOT NULL DEFAULT 0"),
+    ]),
+]
+
+
+def migrate_database(engine):
+    """执行尚未应用的数据库结构迁移"""
+    with engine.connect() as conn:
+        version = conn.exec_driver_sql("PRAGMA user_version").scalar() or 0
+        for target, steps in MIGRATIONS:
+            if target <= version:
+                continue
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.exec_driver_sql(step)
+            conn.exec_driver_sql(f"PRAGMA user_version = {int(target)}")
+            conn.commit()
+            version = target
+
+
+# SQLite 性能配置（每个连接建立时执行 PRAGMA）
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",  # 写操作不阻塞读
+    "synchronous": "NORMAL",  # WAL 模式下只在检查点时同步磁盘
+    "mmap_size": 256 * 1024 * 1024,  # 内存映射读取（字节）
+    "cache_size": -32000,  # 页缓存约32MB（负数单位为KB）
+    "temp_store": "MEMORY",  # 临时表和排序使用内存
+    "busy_timeout": 5000,  # 数据库被锁时等待（毫秒）
+}
+
+
+def apply_pragmas(engine, pragmas):
+    """为引擎的每个新连接应用 PRAGMA 配置"""
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_conn, connection_record):
+        cursor = dbapi_conn.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name} = {value}")
+        finally:
+            cursor.close()
+
+
+def init_database(pragmas=None):
+    """初始化数据库
+
+    pragmas: 覆盖默认 SQLITE_PRAGMAS 中的配置项，值为 None 表示不设置该项
+    """
+    # 连接池：每个会话使用独立连接，不同线程不再共享同一个连接
     engine = create_engine(
         f'sqlite:///{get_database_path()}',
-        poolclass=StaticPool,
+        poolclass=QueuePool,
+        pool_size=5,
+        max_overflow=10,
         connect_args={'check_same_thread': False}
     )
+    profile = dict(SQLITE_PRAGMAS, **(pragmas or {}))
+    apply_pragmas(engine, {name: value for name, value in profile.items() if value is not None})
     Base.metadata.create_all(engine)
+    migrate_database(engine)
     return engine
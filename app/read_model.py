@@ -0,0 +1,414 @@
+"""内存读模型 - 在进程内保存待办的精简记录及分类、标签、假期
+
+界面的筛选、搜索、排序和统计直接在内存中完成，不再查询数据库、不再构建 ORM 对象。
+启动时从数据库加载一次，之后由数据库的变更通知增量更新；
+其他进程写入数据库后（Database.check_external_changes 检测到时）调用 reload() 重新加载。
+每种排序各维护一份有序索引（首次使用时在后台建立），变更时增量更新，查询时只需按索引顺序过滤。
+加载完成前各方法退回到数据库查询。
+"""
+import bisect
+import heapq
+import threading
+from datetime import datetime
+
+from .records import TodoRecord
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _seconds(value):
+    """时间转换为可取反的数值（不受时区和取值范围影响）"""
+    return (value - _EPOCH).total_seconds()
+
+
+def _sort_key(column):
+    """所选列的排序键：(是否非空, 值)，与数据库排序一致（升序 NULL 在前，降序 NULL 在后）"""
+    if column == "id":
+        return lambda record: record.id
+    attr = {"reminder": "reminder_time", "created": "created_at"}.get(column, column)
+
+    def key(record):
+        value = getattr(record, attr)
+        return (value is not None, value if value is not None else 0)
+    return key
+
+
+def _default_key(record):
+    """所选列相同时的顺序（与 Database.get_todo_page 一致）：未完成在前、优先级、创建时间倒序、ID倒序"""
+    created = record.created_at
+    return (record.completed, record.priority, created is None,
+            -_seconds(created) if created is not None else 0, -record.id)
+
+
+def _order_key(index):
+    """有序索引的完整排序键（二分查找用），包含ID因此每条记录唯一
+
+    index 为 None 时只按固定的次要顺序；为 (所选列, 是否倒序) 时先按所选列，reverse 不改变次要顺序
+    """
+    if index is None:
+        return _default_key
+    column, reverse = index
+    sign = -1 if reverse else 1
+    if column == "id":
+        return lambda record: sign * record.id
+    attr = {"reminder": "reminder_time", "created": "created_at"}.get(column, column)
+
+    def key(record):
+        value = getattr(record, attr)
+        if value is None:
+            return (0, 0) + _default_key(record)
+        if isinstance(value, datetime):
+            value = _seconds(value)
+        return (sign, sign * value) + _default_key(record)
+    return key
+
+
+class ReadModel:
+    """内存读模型"""
+
+    _instance = None
+    keyword_limit = 20000  # 待办数超过此值时关键字搜索交给数据库全文索引（逐条匹配太慢）
+    bisect_limit = 200  # 一次变更的待办数不超过此值时逐条二分更新索引，否则合并重建
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if not hasattr(self, '_initialized'):
+            self._initialized = True
+            self._lock = threading.RLock()
+            self._todos = {}  # 待办ID -> TodoRecord
+            self._lookups = None  # 分类/标签查找表（与数据库的精简记录共用）
+            self._holidays = []
+            self._ready = False
+            self._pending = None  # 加载过程中收到的变更（待办ID集合）
+            self._version = 0  # 每次变更递增，用于查询结果缓存
+            self._cache = None  # (查询条件, 版本, 结果)
+            self._indexes = {}  # (排序列, 是否倒序) -> 按该顺序排列的记录列表，None -> 只按次要顺序
+            self._listeners = []  # 变更已应用后调用 callback(todo_ids)
+            self._reloading = False
+            self._building = set()  # 正在后台建立的索引
+
+    @property
+    def ready(self):
+        """是否已加载完成"""
+        return self._ready
+
+    # ========== 加载 ==========
+
+    def load(self):
+        """从数据库加载全部数据并开始跟踪变更"""
+        self._track()
+        self._load_snapshot()
+
+    def _track(self):
+        """开始跟踪变更，加载完成前收到的变更暂存，加载后重新应用"""
+        from .database import db
+
+        with self._lock:
+            self._pending = set()
+        db.add_listener(self._on_todos_changed)
+        db.add_lookup_listener(self._on_lookup_changed)
+
+    def _load_snapshot(self):
+        """读取全部数据，建立默认排序的索引"""
+        from .database import db
+
+        lookups = db.record_lookups()
+        holidays = db.get_all_holidays()
+        todos = {row["id"]: TodoRecord(row, lookups) for row in db.iter_todo_rows()}
+        # 基础索引只按次要顺序排列，各排序列的索引由它稳定排序得到
+        base = sorted(todos.values(), key=_default_key)
+        indexes = {None: base, ("priority", False): sorted(base, key=_sort_key("priority"))}
+
+        with self._lock:
+            self._lookups = lookups
+            self._holidays = holidays
+            self._todos = todos
+            self._indexes = indexes
+            self._cache = None
+            pending, self._pending = self._pending, None
+            self._version += 1
+            self._ready = True
+
+        # 加载过程中发生的变更在快照之后重新应用
+        if pending:
+            self._on_todos_changed(list(pending))
+
+    def load_async(self, on_ready=None):
+        """在后台线程中加载，完成后调用 on_ready()（在后台线程中调用）
+
+        调用返回前已开始跟踪变更，之后的变更都会通知监听者
+        """
+        self._track()
+
+        def run():
+            try:
+                self._load_snapshot()
+            except Exception:
+                return  # 加载失败时继续使用数据库查询
+            finally:
+                self._reloading = False
+            if on_ready:
+                on_ready()
+
+        threading.Thread(target=run, name="read-model-load", daemon=True).start()
+
+    def reload(self):
+        """重新加载（其他进程修改了数据库时使用）"""
+        self.close()
+        self.load()
+
+    def reload_async(self, on_ready=None):
+        """在后台线程中重新加载，期间查询退回到数据库；正在重新加载时不重复执行"""
+        if self._reloading:
+            return
+        self._reloading = True
+        self.close()
+        self.load_async(on_ready)
+
+    def close(self):
+        """停止跟踪变更并清空"""
+        from .database import db
+
+        db.remove_listener(self._on_todos_changed)
+        db.remove_lookup_listener(self._on_lookup_changed)
+        with self._lock:
+            self._ready = False
+            self._todos = {}
+            self._indexes = {}
+            self._cache = None
+
+    # ========== 监听 ==========
+
+    def add_listener(self, callback):
+        """注册变更监听 callback(todo_ids)，在变更应用到读模型之后调用（来自写线程）"""
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        """移除变更监听"""
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self, todo_ids):
+        """通知监听者"""
+        for callback in list(self._listeners):
+            try:
+                callback(todo_ids)
+            except Exception:
+                pass
+
+    # ========== 变更 ==========
+
+    def _on_todos_changed(self, todo_ids):
+        """待办变更 - 重新读取这些待办"""
+        from .database import db
+
+        with self._lock:
+            pending = self._pending is not None
+            if pending:
+                self._pending.update(todo_ids)
+
+        if not pending:
+            rows = {row["id"]: row for row in db.iter_todo_rows(todo_ids)}
+            with self._lock:
+                removed = []
+                added = []
+                for todo_id in todo_ids:
+                    row = rows.get(todo_id)
+                    old = self._todos.pop(todo_id, None)
+                    if old is not None:
+                        removed.append(old)
+                    if row is not None:
+                        record = TodoRecord(row, self._lookups)
+                        self._todos[todo_id] = record
+                        added.append(record)
+                self._update_indexes(removed, added)
+                self._version += 1
+
+        # 变更已应用（或加载完成前暂存，查询仍使用数据库），再通知界面刷新
+        self._notify(todo_ids)
+
+    def _update_indexes(self, removed, added):
+        """增量更新各有序索引：变更少时逐条二分删除/插入，变更多时过滤后归并"""
+        for name, index in self._indexes.items():
+            key = _order_key(name)
+            if len(removed) + len(added) <= self.bisect_limit:
+                for record in removed:
+                    position = bisect.bisect_left(index, key(record), key=key)
+                    if position < len(index) and index[position] is record:
+                        del index[position]
+                    elif record in index:
+                        index.remove(record)
+                for record in added:
+                    bisect.insort(index, record, key=key)
+            else:
+                removed_ids = {record.id for record in removed}
+                kept = [record for record in index if record.id not in removed_ids]
+                index[:] = heapq.merge(kept, sorted(added, key=key), key=key)
+
+    def _on_lookup_changed(self, kind):
+        """分类/标签/假期变更 - 分类和标签查找表已由数据库刷新，假期重新读取"""
+        from .database import db
+
+        if kind == "holidays":
+            holidays = db.get_all_holidays()
+            with self._lock:
+                self._holidays = holidays
+        with self._lock:
+            self._version += 1
+
+    # ========== 查询 ==========
+
+    def can_query(self, keyword=None):
+        """是否可以在内存中查询
+
+        未加载完成、关键字需要全文索引相关度排序、或待办数超过 keyword_limit 时的关键字搜索交给数据库
+        """
+        if not self._ready:
+            return False
+        if keyword:
+            from .database import db
+            return len(self._todos) <= self.keyword_limit and not db.keyword_ranked(keyword)
+        return True
+
+    def query_todos(self, keyword=None, category_id=None, tag_id=None, status=None,
+                    sort="priority", reverse=False):
+        """筛选并排序待办，条件与 Database.get_todo_page 一致；不能在内存中查询时返回 None"""
+        from .database import db
+
+        if not self.can_query(keyword):
+            return None
+
+        params = (keyword, category_id, tag_id, status, sort, reverse)
+        with self._lock:
+            cache = self._cache
+            if cache is not None and cache[0] == params and cache[1] == self._version:
+                return cache[2]
+            version = self._version
+            sort = sort if sort in db.SORT_COLUMNS else "priority"
+            index = self._indexes.get((sort, reverse))
+            if index is not None:
+                records = list(index)
+        if index is None:
+            # 首次使用的排序在后台建立索引，期间交给数据库分页查询
+            self._build_index_async((sort, reverse))
+            return None
+
+        # 按索引顺序过滤，结果已有序
+        terms = [term.casefold() for term in db.keyword_terms(keyword)]
+        result = []
+        for record in records:
+            if status == "completed" and not record.completed:
+                continue
+            if status == "pending" and record.completed:
+                continue
+            if category_id and record.category_id != category_id:
+                continue
+            if tag_id and tag_id not in record.tag_ids:
+                continue
+            if terms:
+                title = record.title.casefold()
+                description = record.description.casefold()
+                if not all(term in title or term in description for term in terms):
+                    continue
+            result.append(record)
+
+        with self._lock:
+            if self._version == version:
+                self._cache = (params, version, result)
+        return result
+
+    def _build_index_async(self, name, attempts=3):
+        """在后台线程中由基础索引稳定排序得到 name 的索引，完成后通知监听者刷新
+
+        排序期间有变更时重新排序，多次重试后在锁内排序
+        """
+        with self._lock:
+            if name in self._building or None not in self._indexes:
+                return
+            self._building.add(name)
+        column, reverse = name
+
+        def run():
+            try:
+                for attempt in range(attempts + 1):
+                    with self._lock:
+                        if not self._ready:
+                            return
+                        version = self._version
+                        base = self._indexes[None]
+                        if attempt == attempts:
+                            # 稳定排序：相同值之间保持基础索引的次要顺序
+                            self._indexes[name] = sorted(base, key=_sort_key(column), reverse=reverse)
+                            break
+                        base = list(base)
+                    index = sorted(base, key=_sort_key(column), reverse=reverse)
+                    with self._lock:
+                        if self._version == version and self._ready:
+                            self._indexes[name] = index
+                            break
+            finally:
+                with self._lock:
+                    self._building.discard(name)
+            self._notify([])
+
+        threading.Thread(target=run, name="read-model-index", daemon=True).start()
+
+    def get_todo(self, todo_id):
+        """获取单个待办"""
+        if not self._ready:
+            from .database import db
+            return db.get_todo(todo_id)
+        return self._todos.get(todo_id)
+
+    def get_all_categories(self):
+        """获取所有分类（按名称排序）"""
+        if not self._ready:
+            from .database import db
+            return db.get_all_categories()
+        return sorted(self._lookups.categories.values(), key=lambda cat: cat.name)
+
+    def get_all_tags(self):
+        """获取所有标签（按名称排序）"""
+        if not self._ready:
+            from .database import db
+            return db.get_all_tags()
+        return sorted(self._lookups.tags.values(), key=lambda tag: tag.name)
+
+    def get_all_holidays(self):
+        """获取所有假期"""
+        if not self._ready:
+            from .database import db
+            return db.get_all_holidays()
+        return list(self._holidays)
+
+    def get_stats(self):
+        """获取统计信息（与 Database.get_stats 一致）"""
+        if not self._ready:
+            from .database import db
+            return db.get_stats()
+
+        now = datetime.now()
+        with self._lock:
+            records = list(self._todos.values())
+        completed = 0
+        overdue = 0
+        for record in records:
+            if record.completed:
+                completed += 1
+            elif record.reminder_time is not None and record.reminder_time < now:
+                overdue += 1
+        return {
+            "total": len(records),
+            "completed": completed,
+            "pending": len(records) - completed,
+            "overdue": overdue
+        }
+
+
+# 全局读模型实例
+read_model = ReadModel()
@@ -0,0 +1,100 @@
+"""待办精简记录 - 列表视图使用的轻量只读对象
+
+与 ORM 的 Todo 相比不带实例状态、不复制分类和标签对象：
+分类和标签通过共享的查找表按ID解析，名称在进程内只保存一份。
+"""
+import json
+import sys
+
+from .models import PRIORITY_MAP, RECURRING_TYPES
+
+
+def _json_list(text):
+    """解析 JSON 列表，返回元组（空列表共用同一个空元组）"""
+    if not text or text == "[]":
+        return ()
+    try:
+        return tuple(json.loads(text))
+    except ValueError:
+        return ()
+
+
+def _intern(value):
+    """短字符串驻留，相同取值的记录共用同一个字符串对象"""
+    return sys.intern(value) if value else value
+
+
+class RecordLookups:
+    """精简记录共用的分类/标签查找表
+
+    分类或标签变更时整体替换字典，已创建的记录随之看到新名称。
+    """
+
+    __slots__ = ("categories", "tags")
+
+    def __init__(self, categories=None, tags=None):
+        self.categories = categories or {}  # 分类ID -> Category
+        self.tags = tags or {}  # 标签ID -> Tag
+
+
+class TodoRecord:
+    """待办的精简只读记录，属性与 Todo 一致，可以直接用于列表、表单和接口"""
+
+    __slots__ = (
+        "id", "title", "description", "priority", "category_id", "reminder_time",
+        "created_at", "completed", "completed_at", "is_recurring", "recurring_type",
+        "recurring_time", "recurring_weekdays", "recurring_monthday", "exclude_holidays",
+        "holidays", "tag_ids", "_lookups",
+    )
+
+    def __init__(self, row, lookups):
+        """row 为包含 todos 表各列及 tag_ids 的映射，tag_ids 可以是列表或 JSON 文本"""
+        self.id = row["id"]
+        self.title = row["title"]
+        self.description = row["description"] or ""
+        self.priority = row["priority"]
+        self.category_id = row["category_id"]
+        self.reminder_time = row["reminder_time"]
+        self.created_at = row["created_at"]
+        self.completed = bool(row["completed"])
+        self.completed_at = row["completed_at"]
+        self.is_recurring = bool(row["is_recurring"])
+        self.recurring_type = _intern(row["recurring_type"])
+        self.recurring_time = row["recurring_time"]
+        self.recurring_weekdays = _json_list(row["recurring_weekdays"])
+        self.recurring_monthday = row["recurring_monthday"]
+        self.exclude_holidays = bool(row["exclude_holidays"])
+        self.holidays = _json_list(row["holiday_json"])
+        tag_ids = row["tag_ids"]
+        self.tag_ids = _json_list(tag_ids) if isinstance(tag_ids, str) else tuple(tag_ids or ())
+        self._lookups = lookups
+
+    @property
+    def category(self):
+        return self._lookups.categories.get(self.category_id)
+
+    @property
+    def tags(self):
+        tags = self._lookups.tags
+        return [tags[tag_id] for tag_id in self.tag_ids if tag_id in tags]
+
+    @property
+    def priority_text(self):
+        return PRIORITY_MAP.get(self.priority, "中")
+
+    @property
+    def recurring_type_text(self):
+        return RECURRING_TYPES.get(self.recurring_type, "不循环")
+
+    @property
+    def tag_names(self):
+        return [tag.name for tag in self.tags]
+
+    def get_recurring_weekdays(self):
+        return list(self.recurring_weekdays)
+
+    def get_holidays(self):
+        return list(self.holidays)
+
+    def __repr__(self):
+        return f"<TodoRecord(id={self.id}, title='{self.title}')>"
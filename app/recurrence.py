@@ -0,0 +1,93 @@
+"""循环提醒规则 - 每天、每周（指定周几）、每月（指定几号），可排除假期
+
+规则从待办解析一次（周几等 JSON 字段只解析一次），之后按日期快速判断；
+排除假期时直接引用共享的假期日历集合，不复制日期。
+数据库把未来一段时间内的提醒时间展开到 recurrence_occurrences 表中，
+"某段时间内有哪些提醒" 即为一次按时间的索引范围查询。
+"""
+import calendar
+from datetime import datetime, timedelta
+
+from .holidays import HolidayCalendar, holiday_calendar
+from .models import RECURRING_DAILY, RECURRING_WEEKLY, RECURRING_MONTHLY
+
+# 展开的时间范围（天）：提醒服务定期把展开水位推进到当前时间之后这么多天
+OCCURRENCE_HORIZON_DAYS = 14
+# 已过去的展开记录保留天数（错过的提醒补发时使用）
+OCCURRENCE_RETENTION_DAYS = 7
+
+# 周一至周五
+WORKWEEK = frozenset(range(5))
+
+
+class RecurrenceRule:
+    """解析后的循环规则（不可变）"""
+
+    __slots__ = ("kind", "time", "weekdays", "monthday", "holidays", "workdays")
+
+    def __init__(self, kind, time, weekdays=(), monthday=None, holidays=(), workdays=frozenset()):
+        self.kind = kind or RECURRING_DAILY
+        self.time = time
+        self.weekdays = frozenset(weekdays)  # 周几 0-6（周一=0），为空表示每天
+        self.monthday = monthday or 1  # 每月几号，超过当月天数时取月末
+        self.holidays = holidays if isinstance(holidays, frozenset) else HolidayCalendar.to_ordinals(holidays)
+        self.workdays = workdays  # 调休上班日序数集合
+
+    @classmethod
+    def from_todo(cls, todo, calendar=None):
+        """从待办（Todo 或 TodoRecord）解析规则，非循环或已完成时返回None
+
+        排除假期时按假期日历跳过假期、调休上班日按工作日提醒；待办自带的假期日期（导入数据）一并排除。
+        calendar: (假期序数集合, 调休上班日序数集合)，默认使用全局假期日历
+        """
+        if todo.completed or not todo.is_recurring or not todo.recurring_time:
+            return None
+
+        monthday = todo.recurring_monthday
+        if not monthday and todo.created_at:
+            monthday = todo.created_at.day
+
+        excluded = workdays = frozenset()
+        if todo.exclude_holidays:
+            if calendar is None:
+                calendar = holiday_calendar.ordinals, holiday_calendar.workday_ordinals
+            excluded, workdays = calendar
+            extra = todo.get_holidays()
+            if extra:
+                excluded = excluded | HolidayCalendar.to_ordinals(extra)
+        return cls(
+            todo.recurring_type,
+            todo.recurring_time,
+            weekdays=todo.get_recurring_weekdays() if todo.recurring_type == RECURRING_WEEKLY else (),
+            monthday=monthday,
+            holidays=excluded,
+            workdays=workdays,
+        )
+
+    def occurs_on(self, day):
+        """指定日期是否提醒"""
+        if self.kind == RECURRING_WEEKLY and self.weekdays and day.weekday() not in self.weekdays:
+            # 调休上班日：每周一至周五都提醒的规则在周末补班当天也提醒
+            if not (WORKWEEK <= self.weekdays and day.toordinal() in self.workdays):
+                return False
+        if self.kind == RECURRING_MONTHLY:
+            last_day = calendar.monthrange(day.year, day.month)[1]
+            if day.day != min(self.monthday, last_day):
+                return False
+        return day.toordinal() not in self.holidays
+
+    def occurrences(self, start, end):
+        """生成 start 到 end 之间（均包含）的提醒时间，按时间顺序"""
+        day = start.date()
+        last = end.date()
+        while day <= last:
+            if self.occurs_on(day):
+                due = datetime.combine(day, self.time)
+                if start <= due <= end:
+                    yield due
+            day += timedelta(days=1)
+
+    def next_after(self, after, max_days=366):
+        """after 之后的下一次提醒时间，max_days 天内没有则返回None"""
+        end = after + timedelta(days=max_days + 1)
+        return next((due for due in self.occurrences(after, end) if due > after), None)
@@ -3,22 +3,28 @@ import sys
 if 'E:/Python/TodoX' not in sys.path:
     sys.path.insert(0, 'E:/Python/TodoX')
 
+import heapq
 import threading
-import time
 from datetime import datetime, timedelta
 
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.interval import IntervalTrigger
-from apscheduler.triggers.cron import CronTrigger
-
 
 class ReminderService:
-    """提醒服务"""
+    """提醒服务
+
+    在内存中维护按提醒时间排序的最小堆，只在最早的提醒到期时唤醒一次，
+    待办变更时由数据库通知重新计算对应条目并重新设定唤醒时间。
+    启动时及休眠唤醒后补发检查点之后错过的循环提醒和已过期未触发的单次提醒（检查点由心跳定期保存到数据库），
+    与定时触发共用一把锁，补发完成前不会触发这些提醒。
+    """
 
     _instance = None
     _scheduler = None
     _running = False
-    _check_interval = 1  # 检查间隔（秒），1秒检查一次保证及时性
+    _resync_interval = 30  # 全量校准间隔（分钟），用于应对系统时间调整
+    _maintenance_interval = 60  # 数据库空闲维护间隔（分钟）
+    _heartbeat_interval = 60  # 心跳间隔（秒），两次心跳相隔超过两倍间隔视为休眠唤醒
+    # 检查点只在内存中随心跳更新，在全量校准、唤醒补发和停止时才写入数据库（空闲时不产生写事务）
+    _checkpoint_key = "reminder_checkpoint"
 
     def __new__(cls):
         if cls._instance is None:
@@ -29,77 +35,391 @@ class ReminderService:
         if not hasattr(self, '_initialized'):
             self._initialized = True
             self._main_window = None
+            self._sinks = []  # 其他提醒输出（无界面模式），sink(todo)
+            self.auto_acknowledge = False  # 投递后即标记为已处理（没有界面可以完成/稍后提醒时使用）
+            self._lock = threading.RLock()
+            self._heap = []  # [(提醒时间, 待办ID)]
+            self._due = {}  # 待办ID -> 当前有效的提醒时间
+            self._fired = {}  # 待办ID -> 已触发的单次提醒时间（与数据库触发记录同步）
+            self._armed_at = None  # 当前已设定的唤醒时间
+            self._checkpoint = None  # 最近一次心跳时间，此前的提醒均已处理
+            self._saved_checkpoint = None  # 已写入数据库的检查点
+            # 补发错过的循环提醒：once 每个待办只提醒最近一次，each 每次都提醒，off 不补发
+            self.catch_up_mode = "once"
+            self.catch_up_limit = 20  # 一次补发最多提醒的次数（保留最近的）
 
     def setup(self, main_window):
         """设置主窗口引用"""
         self._main_window = main_window
 
+    def add_sink(self, sink):
+        """添加提醒输出 sink(todo)"""
+        self._sinks.append(sink)
+
     def start(self):
         """启动提醒服务"""
         if self._running:
             return
 
+        # 调度器在启动时才导入，导入本模块不依赖 APScheduler
+        from apscheduler.schedulers.background import BackgroundScheduler
+        from apscheduler.triggers.interval import IntervalTrigger
+        from app.database import db
+
         self._running = True
         self._scheduler = BackgroundScheduler()
 
-        # 每秒检查一次提醒（保证及时性）
+        # 定期全量校准（系统时间调整、跨天等）
         self._scheduler.add_job(
-            self._check_reminders,
-            IntervalTrigger(seconds=self._check_interval),
-            id='check_reminders',
+            self._resync,
+            IntervalTrigger(minutes=self._resync_interval),
+            id='resync_reminders',
             replace_existing=True
         )
 
-        # 每天凌晨1点检查循环提醒
+        # 数据库空闲维护（PRAGMA optimize、WAL 检查点）
         self._scheduler.add_job(
-            self._schedule_recurring,
-            CronTrigger(hour=1, minute=0),
-            id='schedule_recurring',
+            self._run_maintenance,
+            IntervalTrigger(minutes=self._maintenance_interval),
+            id='db_maintenance',
             replace_existing=True
         )
 
+        # 心跳：保存检查点，检测休眠唤醒
+        self._scheduler.add_job(
+            self._heartbeat,
+            IntervalTrigger(seconds=self._heartbeat_interval),
+            id='heartbeat',
+            replace_existing=True,
+            misfire_grace_time=None,  # 唤醒后立即执行
+            coalesce=True
+        )
+
         self._scheduler.start()
+        db.add_listener(self._on_todos_changed)
+        # 补发完成前不触发已到期的提醒（_fire_due 需要同一把锁），错过的提醒都经过补发的合并和上限
+        with self._lock:
+            self._resync()
+            self._restore_pending()
+            self._catch_up_from_checkpoint()
 
     def stop(self):
         """停止提醒服务"""
+        from app.database import db
+
+        db.remove_listener(self._on_todos_changed)
         if self._scheduler:
             self._scheduler.shutdown(wait=False)
+        if self._running:
+            self._save_checkpoint(datetime.now())
         self._running = False
+        self._armed_at = None
+
+    # ========== 调度 ==========
+
+    def _next_due(self, todo, now):
+        """计算待办的下一次提醒时间"""
+        if todo is None or todo.completed:
+            return None
+
+        candidates = []
+        if todo.reminder_time and self._fired.get(todo.id) != todo.reminder_time:
+            candidates.append(todo.reminder_time)
+
+        recurring_time = todo.next_recurring_time(now)
+        if recurring_time:
+            candidates.append(recurring_time)
 
-    def _check_reminders(self):
-        """检查提醒"""
-        if not self._main_window:
+        return min(candidates) if candidates else None
+
+    def _set_due(self, todo_id, due):
+        """更新待办在堆中的提醒时间（旧条目惰性删除）"""
+        if due is None:
+            self._due.pop(todo_id, None)
+            return
+        if self._due.get(todo_id) == due:
             return
+        self._due[todo_id] = due
+        heapq.heappush(self._heap, (due, todo_id))
 
+    def _resync(self):
+        """从数据库全量重建提醒堆"""
         from app.database import db
 
         try:
-            # 获取需要提醒的待办
-            todos = db.get_todos_to_remind()
+            todos = db.get_todos_with_reminders()
+            fired = db.get_fired_reminder_times()
+        except Exception:
+            return
+
+        try:
+            db.extend_occurrences()  # 推进循环提醒的展开范围
+        except Exception:
+            pass
 
+        now = datetime.now()
+        with self._lock:
+            self._fired = fired
+            self._heap = []
+            self._due = {}
             for todo in todos:
-                # 显示提醒弹窗
-                self._main_window.show_reminder(todo)
+                self._set_due(todo.id, self._next_due(todo, now))
+            self._arm()
 
-        except Exception as e:
-            pass  # 静默处理
+        # 持久化内存中的检查点（启动时尚未设置，由启动补发保存）
+        if self._checkpoint is not None:
+            self._save_checkpoint(self._checkpoint)
 
-    def _schedule_recurring(self):
-        """调度循环提醒"""
-        if not self._main_window:
+    def _on_todos_changed(self, todo_ids):
+        """待办变更 - 重新计算相关条目的提醒时间"""
+        if not self._running:
             return
 
         from app.database import db
 
         try:
-            # 获取今天需要循环提醒的待办
-            todos = db.get_recurring_todos_for_today()
+            todos = db.get_todos_by_ids(todo_ids)
+        except Exception:
+            return
 
-            for todo in todos:
+        now = datetime.now()
+        with self._lock:
+            for todo_id in todo_ids:
+                todo = todos.get(todo_id)
+                if todo is None:
+                    self._fired.pop(todo_id, None)
+                self._set_due(todo_id, self._next_due(todo, now))
+            self._arm()
+
+    def _arm(self):
+        """按堆顶时间设定下一次唤醒"""
+        # 清理失效的堆顶条目
+        while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+
+        next_time = self._heap[0][0] if self._heap else None
+        if next_time == self._armed_at or not self._scheduler:
+            return
+
+        self._armed_at = next_time
+        if next_time is None:
+            if self._scheduler.get_job('fire_reminders'):
+                self._scheduler.remove_job('fire_reminders')
+            return
+
+        from apscheduler.triggers.date import DateTrigger
+
+        self._scheduler.add_job(
+            self._fire_due,
+            DateTrigger(run_date=max(next_time, datetime.now())),
+            id='fire_reminders',
+            replace_existing=True,
+            misfire_grace_time=None,  # 休眠唤醒后仍然执行
+            coalesce=True,
+            max_instances=2  # 触发过程中重新设定的唤醒不被跳过（重复触发由数据库去重）
+        )
+
+    def _fire_due(self):
+        """触发所有已到期的提醒"""
+        from app.database import db
+
+        now = datetime.now()
+        # 休眠唤醒后定时任务可能先于心跳执行，先补发，已补发（或合并、超出上限）的提醒不再触发
+        self._check_wake(now)
+        due_ids = []
+        with self._lock:
+            self._armed_at = None
+            while self._heap and self._heap[0][0] <= now:
+                due, todo_id = heapq.heappop(self._heap)
+                if self._due.get(todo_id) != due:
+                    continue
+                del self._due[todo_id]
+                due_ids.append((todo_id, due))
+
+        if due_ids:
+            # 整批到期的提醒一次读取、一次记录触发
+            try:
+                todos = db.get_todos_by_ids([todo_id for todo_id, _ in due_ids], loaded=True)
+            except Exception:
+                todos = {}
+
+            fire = []
+            for todo_id, due in due_ids:
+                todo = todos.get(todo_id)
+                if todo is None or todo.completed:
+                    continue
+
+                if todo.reminder_time == due:
+                    self._fired[todo_id] = due
+                # 休眠期间错过的循环提醒由补发统一处理（按 catch_up_mode 合并）；
+                # 待办自己的单次提醒时间不在展开记录中，照常触发
+                stale = (
+                    todo.is_recurring
+                    and due != todo.reminder_time
+                    and (now - due).total_seconds() > self._heartbeat_interval * 2
+                )
+                if not stale:
+                    fire.append((todo_id, due))
+
+            # 每次提醒只触发一次（以数据库记录为准）
+            try:
+                claimed = db.claim_reminders(fire)
+            except Exception:
+                claimed = []
+            for todo_id, _ in claimed:
+                self._show_reminder(todos[todo_id])
+
+            with self._lock:
+                for todo_id, due in due_ids:
+                    todo = todos.get(todo_id)
+                    if todo is not None:
+                        self._set_due(todo_id, self._next_due(todo, max(now, due)))
+
+        with self._lock:
+            self._arm()
+
+    # ========== 补发 ==========
+
+    def _heartbeat(self):
+        """心跳 - 更新检查点，检测休眠唤醒"""
+        self._check_wake(datetime.now())
+
+    def _check_wake(self, now):
+        """距上次心跳过久说明刚从休眠中唤醒，补发期间错过的提醒，否则只更新内存中的检查点"""
+        with self._lock:
+            last = self._checkpoint
+            if last and (now - last).total_seconds() > self._heartbeat_interval * 2:
+                self.catch_up(last, now)
+                self._save_checkpoint(now)
+            elif last is None or now > last:
+                self._checkpoint = now
+
+    def _catch_up_from_checkpoint(self):
+        """启动时补发上次退出（或最后一次心跳）之后错过的提醒"""
+        from app.database import db
+
+        now = datetime.now()
+        try:
+            value = db.get_state(self._checkpoint_key)
+            checkpoint = datetime.fromisoformat(value) if value else None
+        except Exception:
+            checkpoint = None
+        # 没有检查点（首次运行）时只处理已过期的单次提醒
+        self.catch_up(checkpoint if checkpoint and checkpoint < now else now, now)
+        self._save_checkpoint(now)
+
+    def _save_checkpoint(self, moment):
+        """保存检查点并写入数据库（与已写入的相同时跳过）"""
+        from app.database import db
+
+        self._checkpoint = moment
+        if moment == self._saved_checkpoint:
+            return
+        try:
+            db.set_state(self._checkpoint_key, moment.isoformat())
+            self._saved_checkpoint = moment
+        except Exception:
+            pass  # 下次校准时再保存
+
+    def catch_up(self, since, now=None):
+        """补发 (since, now] 之间错过的循环提醒及 now 之前所有未触发的单次提醒，返回弹出的提醒数
+
+        按 catch_up_mode 合并，最多提醒 catch_up_limit 次（保留最近的），
+        其余记录为已处理不再弹出（off 模式全部不弹出）；循环提醒最早只追溯到展开记录的保留期。
+        已经触发过的提醒（包括唤醒时定时任务已触发的）不会重复弹出。
+        """
+        from app.database import db
+        from app.recurrence import OCCURRENCE_RETENTION_DAYS
+
+        now = now or datetime.now()
+        since = max(since, now - timedelta(days=OCCURRENCE_RETENTION_DAYS))
+        try:
+            missed = db.get_occurrences_between(since, now) + db.get_missed_reminders(now)
+        except Exception:
+            return 0
+        # 循环待办的单次提醒时间可能与展开记录相同
+        missed = sorted(dict.fromkeys(missed), key=lambda item: item[1])
+
+        by_todo = {}
+        for todo_id, due in missed:
+            by_todo.setdefault(todo_id, []).append(due)
+
+        show = []
+        silent = []
+        for todo_id, dues in by_todo.items():
+            if self.catch_up_mode == "off":
+                silent.extend((todo_id, due) for due in dues)
+            elif self.catch_up_mode == "each":
+                show.extend((todo_id, due) for due in dues)
+            else:
+                show.append((todo_id, dues[-1]))
+                silent.extend((todo_id, due) for due in dues[:-1])
+        show.sort(key=lambda item: item[1], reverse=True)
+        silent.extend(show[self.catch_up_limit:])
+        show = sorted(show[:self.catch_up_limit], key=lambda item: item[1])
+
+        try:
+            db.claim_reminders(silent, acknowledged=True)
+            claimed = db.claim_reminders(show)
+        except Exception:
+            return 0
+        if not claimed:
+            return 0
+
+        try:
+            todos = db.get_todos_by_ids({todo_id for todo_id, _ in claimed}, loaded=True)
+        except Exception:
+            return 0
+
+        count = 0
+        for todo_id, due in claimed:
+            todo = todos.get(todo_id)
+            if todo is not None and not todo.completed:
+                self._show_reminder(todo)
+                count += 1
+        return count
+
+    def _run_maintenance(self):
+        """数据库空闲维护"""
+        from app.database import db
+
+        try:
+            db.run_maintenance()
+        except Exception:
+            pass  # 数据库忙时下次再试
+
+    def _restore_pending(self):
+        """恢复上次退出前已触发但未处理的提醒"""
+        from app.database import db
+
+        try:
+            todos = db.get_pending_reminders()
+        except Exception:
+            return
+
+        for todo in todos:
+            self._show_reminder(todo)
+
+    def _show_reminder(self, todo):
+        """显示提醒"""
+        if self._main_window:
+            try:
                 self._main_window.show_reminder(todo)
+            except Exception as e:
+                pass  # 静默处理
+
+        for sink in self._sinks:
+            try:
+                sink(todo)
+            except Exception:
+                pass  # 单个输出失败不影响其他输出
 
-        except Exception as e:
-            pass  # 静默处理
+        if self.auto_acknowledge:
+            from app.database import db
+            try:
+                db.acknowledge_reminders([todo.id])
+            except Exception:
+                pass
 
     def snooze(self, todo_id, minutes):
         """稍后提醒"""
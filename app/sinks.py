@@ -0,0 +1,79 @@
+"""提醒输出 - 无界面模式下的提醒投递方式
+
+每个输出都是可调用对象 sink(todo)，由提醒服务在提醒触发时调用。
+"""
+import json
+import queue
+import sys
+import threading
+import urllib.request
+from datetime import datetime
+
+
+def reminder_payload(todo):
+    """提醒内容（可序列化为 JSON 的字典）"""
+    return {
+        "id": todo.id,
+        "title": todo.title,
+        "description": todo.description or "",
+        "priority": todo.priority_text,
+        "category": todo.category.name if todo.category else None,
+        "tags": todo.tag_names,
+        "reminder_time": todo.reminder_time.isoformat() if todo.reminder_time else None,
+        "is_recurring": bool(todo.is_recurring),
+        "fired_at": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+class StdoutSink:
+    """输出到标准输出，每条提醒一行"""
+
+    def __call__(self, todo):
+        payload = reminder_payload(todo)
+        print(f"[{payload['fired_at']}] 提醒: {payload['title']} (优先级 {payload['priority']})", flush=True)
+
+
+class LogFileSink:
+    """追加写入日志文件，每条提醒一行 JSON"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def __call__(self, todo):
+        line = json.dumps(reminder_payload(todo), ensure_ascii=False)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+class WebhookSink:
+    """以 JSON POST 到指定地址
+
+    请求在后台线程中依次发送，不阻塞提醒调度；发送失败只输出到标准错误。
+    """
+
+    def __init__(self, url, timeout=5):
+        self.url = url
+        self.timeout = timeout
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="webhook-sink", daemon=True)
+        self._thread.start()
+
+    def __call__(self, todo):
+        self._queue.put(reminder_payload(todo))
+
+    def _run(self):
+        while True:
+            payload = self._queue.get()
+            request = urllib.request.Request(
+                self.url,
+                data=json.dumps(payload, ensure_ascii=False).encode("utf-8"),
+                headers={"Content-Type": "application/json; charset=utf-8"},
+                method="POST"
+            )
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    response.read()
+            except Exception as e:
+                print(f"Webhook 发送失败: {e}", file=sys.stderr, flush=True)
@@ -1,3 +1,3 @@
 """ui包"""
 from .main_window import MainWindow
-from .notification import ReminderPopup
+from .notification import ReminderCenter
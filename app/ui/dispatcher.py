@@ -0,0 +1,94 @@
+"""界面事件分发 - 后台线程与Tk主循环之间的线程安全队列"""
+import queue
+
+
+class UiDispatcher:
+    """界面事件分发器
+
+    任意线程调用 post() 投递事件（只入队，不调用 Tk），Tk 主循环通过 after() 定时批量取出并处理。
+    同一批次内标记为合并的事件只调用一次处理函数（多个事件类型共用同一处理函数时也只调用一次）。
+    有事件到达时按短间隔分发，队列持续为空时逐步放慢到空闲间隔，减少空闲唤醒。
+    """
+
+    def __init__(self, widget, interval=50, idle_interval=1000, max_batch=1000):
+        self._widget = widget
+        self._queue = queue.SimpleQueue()
+        self._handlers = {}  # 事件类型 -> (处理函数, 是否合并)
+        self._interval = interval  # 有事件时的分发间隔（毫秒）
+        self._idle_interval = idle_interval  # 空闲时的最大分发间隔（毫秒）
+        self._delay = interval  # 下一次分发的间隔
+        self._max_batch = max_batch  # 每批最多处理的事件数
+        self._after_id = None  # 已安排的分发（只在 Tk 线程中读写）
+        self._running = False
+
+    def register(self, kind, handler, coalesce=False):
+        """注册事件处理函数
+
+        coalesce=True 时处理函数无参数，每批最多调用一次；
+        否则处理函数接收该批次内此类事件的 payload 列表。
+        """
+        self._handlers[kind] = (handler, coalesce)
+
+    def post(self, kind, payload=None):
+        """投递事件（线程安全，只入队）"""
+        self._queue.put((kind, payload))
+
+    def start(self):
+        """开始分发（在 Tk 线程中调用）"""
+        self._running = True
+        self._delay = self._interval
+        if self._after_id is None:
+            self._after_id = self._widget.after(self._delay, self._drain)
+
+    def stop(self):
+        """停止分发（在 Tk 线程中调用）"""
+        self._running = False
+        after_id, self._after_id = self._after_id, None
+        if after_id is not None:
+            try:
+                self._widget.after_cancel(after_id)
+            except Exception:
+                pass
+
+    def _drain(self):
+        """取出一批事件并分发，然后安排下一次分发"""
+        self._after_id = None
+        batches = {}
+        for _ in range(self._max_batch):
+            try:
+                kind, payload = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batches.setdefault(kind, []).append(payload)
+
+        coalesced = []
+        for kind, payloads in batches.items():
+            handler, coalesce = self._handlers.get(kind, (None, False))
+            if handler is None:
+                continue
+            if coalesce:
+                if handler not in coalesced:
+                    coalesced.append(handler)
+                continue
+            try:
+                handler(payloads)
+            except Exception:
+                pass  # 单个事件出错不影响后续分发
+
+        for handler in coalesced:
+            try:
+                handler()
+            except Exception:
+                pass
+
+        if not self._running:
+            return
+        # 有事件时保持短间隔，空闲时间隔逐次加倍直到空闲间隔
+        if batches or not self._queue.empty():
+            self._delay = self._interval
+        else:
+            self._delay = min(self._delay * 2, self._idle_interval)
+        try:
+            self._after_id = self._widget.after(self._delay, self._drain)
+        except Exception:
+            pass  # 窗口已销毁
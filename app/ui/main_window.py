@@ -1,4 +1,8 @@
-"""主窗口"""
+"""主窗口
+
+数据库和读模型在方法内导入：窗口先用空列表完成首次绘制，数据库在后台打开后再调用 load() 加载数据。
+"""
+import threading
 import tkinter as tk
 from tkinter import ttk
 from datetime import datetime
@@ -7,9 +11,8 @@ from .styles import COLORS, FONTS, PADDING, SIZES
 from .theme import theme
 from .todo_list import TodoList
 from .todo_form import TodoForm
-from .notification import ReminderPopup, TaskCompletedPopup
-from ..database import db
-from ..models import Todo, Tag
+from .notification import ReminderCenter, TaskCompletedPopup
+from .dispatcher import UiDispatcher
 
 
 class MainWindow(tk.Frame):
@@ -23,8 +26,84 @@ class MainWindow(tk.Frame):
         self._search_keyword = ""
         self._current_category = None
         self._current_tag = None
+        self._reminder_center = None
+
+        # 搜索状态
+        self._search_delay = 250  # 输入防抖（毫秒）
+        self._search_after_id = None
+        self._search_generation = 0  # 每次发起查询递增，用于丢弃过期结果
+        self._last_result = None  # (查询条件, 待办列表, 是否完整)，用于关键字追加输入时在内存中细化
+        self._page_size = 500  # 列表分页大小
+        self._loaded = False  # 是否已连接数据库并加载数据
+        self._external_check_interval = 5000  # 检查其他进程写入的间隔（毫秒）
+        self._external_after_id = None
 
         self._build_ui()
+        self._setup_dispatcher()
+
+    def _setup_dispatcher(self):
+        """设置界面事件分发（后台线程只通过队列与界面交互）"""
+        self.dispatcher = UiDispatcher(self)
+        self.dispatcher.register("reminder", self._show_reminders)
+        self.dispatcher.register("search_result", self._on_search_results)
+        self.dispatcher.register("data_changed", self._refresh_data, coalesce=True)
+        self.dispatcher.register("refresh", self._refresh_data, coalesce=True)
+        self.dispatcher.start()
+
+    def load(self):
+        """连接数据库并加载数据（数据库打开后在界面线程调用）"""
+        if self._loaded:
+            return
+
+        from ..read_model import read_model
+
+        self._loaded = True
+        # 读模型应用变更之后再通知界面刷新
+        read_model.add_listener(self._on_db_changed)
+
+        # 后台加载内存读模型，完成后列表改为在内存中筛选排序
+        read_model.load_async(on_ready=self.request_refresh)
+
+        # 读模型加载完成前先显示数据库查询的第一页
+        self._refresh_data()
+        self._external_after_id = self.after(self._external_check_interval, self._check_external_changes)
+
+    def destroy(self):
+        """销毁时停止事件分发"""
+        if self._loaded:
+            from ..read_model import read_model
+
+            if self._external_after_id is not None:
+                self.after_cancel(self._external_after_id)
+            read_model.remove_listener(self._on_db_changed)
+            read_model.close()
+        if hasattr(self, 'dispatcher'):
+            self.dispatcher.stop()
+        super().destroy()
+
+    def _on_db_changed(self, todo_ids):
+        """数据库变更通知（可能来自任意线程）"""
+        self.dispatcher.post("data_changed", todo_ids)
+
+    def _check_external_changes(self):
+        """定期检查其他进程（导入脚本等）写入的数据，有变化时在后台重新加载读模型"""
+        from ..database import db
+        from ..read_model import read_model
+
+        # 读模型加载期间不检查，加载完成后再确认期间的写入
+        if read_model.ready:
+            try:
+                if db.check_external_changes():
+                    read_model.reload_async(on_ready=self.request_refresh)
+                    # 重新加载期间先显示数据库查询的结果
+                    self.request_refresh()
+            except Exception:
+                pass
+        self._external_after_id = self.after(self._external_check_interval, self._check_external_changes)
+
+    def request_refresh(self):
+        """请求刷新界面（线程安全）"""
+        self.dispatcher.post("refresh")
 
     def _build_ui(self):
         """构建UI"""
@@ -105,7 +184,8 @@ class MainWindow(tk.Frame):
         self.todo_list = TodoList(
             list_container,
             on_item_click=self._on_edit_todo,
-            on_item_right_click=self._on_batch_action
+            on_item_right_click=self._on_batch_action,
+            on_sort_change=self._on_sort_change
         )
         self.todo_list.pack(fill="both", expand=True)
 
@@ -211,17 +291,19 @@ class MainWindow(tk.Frame):
         tag_btn.bind("<Enter>", lambda e: tag_btn.configure(bg=COLORS["border"]))
         tag_btn.bind("<Leave>", lambda e: tag_btn.configure(bg=COLORS["frame"]))
 
-        # 加载初始数据
-        self._refresh_data()
-
     def _refresh_data(self):
         """刷新数据"""
+        if not self._loaded:
+            return  # 数据库打开后由 load() 加载
+
+        from ..read_model import read_model
+
         # 加载分类
-        categories = db.get_all_categories()
+        categories = read_model.get_all_categories()
         self.category_combo['values'] = ["全部分类"] + [c.name for c in categories]
 
         # 加载标签
-        tags = db.get_all_tags()
+        tags = read_model.get_all_tags()
         self.tag_combo['values'] = ["全部标签"] + [t.name for t in tags]
 
         # 加载待办
@@ -230,40 +312,78 @@ class MainWindow(tk.Frame):
         # 更新统计
         self._update_stats()
 
-    def _load_todos(self):
-        """加载待办列表"""
-        todos = db.search_todos(
-            keyword=self._search_keyword,
-            category_id=self._current_category,
-            tag_id=self._current_tag,
-            include_completed=(self._current_filter != "pending")
+    def _query_params(self):
+        """当前查询条件"""
+        sort, reverse = self.todo_list.sort_state
+        return (self._search_keyword, self._current_category, self._current_tag,
+                self._current_filter, sort, reverse)
+
+    def _query_todos(self, params, limit=None):
+        """按查询条件查询第一页，返回 (待办列表, 下一页游标, 总数)
+
+        读模型已加载时在内存中查询全部结果，不分页
+        """
+        from ..database import db
+        from ..read_model import read_model
+
+        keyword, category_id, tag_id, status, sort, reverse = params
+        filters = dict(keyword=keyword, category_id=category_id, tag_id=tag_id, status=status)
+        todos = read_model.query_todos(sort=sort, reverse=reverse, **filters)
+        if todos is not None:
+            return todos, None, len(todos)
+        todos, cursor = db.get_todo_page(
+            sort=sort, reverse=reverse, limit=limit or self._page_size, lite=True, **filters
         )
+        total = len(todos) if cursor is None else db.count_todos(**filters)
+        return todos, cursor, total
 
-        # 按状态筛选
-        if self._current_filter == "pending":
-            todos = [t for t in todos if not t.completed]
-        elif self._current_filter == "completed":
-            todos = [t for t in todos if t.completed]
+    def _page_fetcher(self, params, cursor):
+        """创建按游标加载后续页的函数"""
+        from ..database import db
 
-        self.todo_list.load_todos(todos)
+        keyword, category_id, tag_id, status, sort, reverse = params
+        state = {"cursor": cursor}
+
+        def fetch_more():
+            todos, state["cursor"] = db.get_todo_page(
+                keyword=keyword, category_id=category_id, tag_id=tag_id, status=status,
+                sort=sort, reverse=reverse, after=state["cursor"], limit=self._page_size, lite=True
+            )
+            return todos, state["cursor"] is not None
+
+        return fetch_more
+
+    def _load_todos(self):
+        """加载待办列表"""
+        if not self._loaded:
+            return
+        # 使进行中的后台搜索结果失效
+        self._search_generation += 1
+        params = self._query_params()
+        # 刷新时重新加载已显示的行数，保持滚动位置
+        limit = max(self._page_size, self.todo_list.loaded_count())
+        self._show_todos(params, *self._query_todos(params, limit))
+
+    def _show_todos(self, params, todos, cursor=None, total=None):
+        """显示查询结果"""
+        if total is None:
+            total = len(todos)
+        self._last_result = (params, todos, cursor is None)
+        fetch_more = self._page_fetcher(params, cursor) if cursor is not None else None
+        self.todo_list.load_todos(todos, fetch_more=fetch_more, total=total)
 
         # 更新状态栏 - 显示当前筛选后的数量
-        todos = db.search_todos(
-            keyword=self._search_keyword,
-            category_id=self._current_category,
-            tag_id=self._current_tag,
-            include_completed=(self._current_filter != "pending")
-        )
-        # 按状态筛选
-        if self._current_filter == "pending":
-            todos = [t for t in todos if not t.completed]
-        elif self._current_filter == "completed":
-            todos = [t for t in todos if t.completed]
-        self.status_label.config(text=f"共 {len(todos)} 个待办")
+        self.status_label.config(text=f"共 {total} 个待办")
+
+    def _on_sort_change(self, column, reverse):
+        """列表排序变化 - 由数据库排序后重新加载"""
+        self._load_todos()
 
     def _update_stats(self):
         """更新统计信息"""
-        stats = db.get_stats()
+        from ..read_model import read_model
+
+        stats = read_model.get_stats()
         # 可以在这里更新更多统计信息
 
     def _update_filter_buttons(self):
@@ -291,10 +411,79 @@ class MainWindow(tk.Frame):
             self._search_keyword = keyword
         else:
             self._search_keyword = ""
-        self._load_todos()
+
+        # 防抖：停止输入一段时间后再查询
+        if self._search_after_id is not None:
+            self.after_cancel(self._search_after_id)
+        self._search_after_id = self.after(self._search_delay, self._run_search)
+
+    def _run_search(self):
+        """执行搜索 - 读模型可以查询或可细化时在内存中过滤，否则在后台线程查询"""
+        from ..database import db
+        from ..read_model import read_model
+
+        self._search_after_id = None
+        self._search_generation += 1
+        generation = self._search_generation
+        params = self._query_params()
+
+        if read_model.can_query(params[0]):
+            self._show_todos(params, *self._query_todos(params))
+            return
+
+        refined = self._refine_last_result(params)
+        if refined is not None:
+            self._show_todos(params, refined)
+            if not db.keyword_ranked(params[0]):
+                return
+            # 先显示细化结果，再由后台查询按新关键字的相关度重新排序
+
+        def worker():
+            try:
+                result = self._query_todos(params)
+            except Exception:
+                return
+            self.dispatcher.post("search_result", (generation, params) + result)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _refine_last_result(self, params):
+        """新关键字是上次关键字的延长时，直接过滤上次结果"""
+        from ..database import db
+
+        if self._last_result is None:
+            return None
+        last_params, last_todos, complete = self._last_result
+        keyword, last_keyword = params[0], last_params[0]
+        if not complete or params[1:] != last_params[1:] or not last_keyword:
+            return None
+        if keyword == last_keyword or not keyword.startswith(last_keyword):
+            return None
+
+        # 与数据库搜索使用同一套分词规则；上次的每个词都包含在某个新词中时，新结果才是上次结果的子集
+        terms = db.keyword_terms(keyword)
+        if not all(any(last in term for term in terms) for last in db.keyword_terms(last_keyword)):
+            return None
+        terms = [term.casefold() for term in terms]
+        return [
+            todo for todo in last_todos
+            if all(
+                term in (todo.title or "").casefold() or term in (todo.description or "").casefold()
+                for term in terms
+            )
+        ]
+
+    def _on_search_results(self, results):
+        """后台搜索完成 - 只显示最新一次搜索的结果"""
+        generation, params, todos, cursor, total = max(results, key=lambda result: result[0])
+        if generation != self._search_generation:
+            return
+        self._show_todos(params, todos, cursor, total)
 
     def _on_filter_change(self, event):
         """筛选条件变化"""
+        from ..read_model import read_model
+
         # 确保UI已初始化
         if not hasattr(self, 'todo_list'):
             return
@@ -304,7 +493,7 @@ class MainWindow(tk.Frame):
         if category_name == "全部分类":
             self._current_category = None
         else:
-            categories = db.get_all_categories()
+            categories = read_model.get_all_categories()
             for c in categories:
                 if c.name == category_name:
                     self._current_category = c.id
@@ -315,7 +504,7 @@ class MainWindow(tk.Frame):
         if tag_name == "全部标签":
             self._current_tag = None
         else:
-            tags = db.get_all_tags()
+            tags = read_model.get_all_tags()
             for t in tags:
                 if t.name == tag_name:
                     self._current_tag = t.id
@@ -325,12 +514,14 @@ class MainWindow(tk.Frame):
 
     def _on_add_todo(self):
         """添加待办"""
+        from ..read_model import read_model
+
         form = TodoForm(
             self,
             on_save=self._save_todo
         )
-        form.set_categories(db.get_all_categories())
-        form.set_tags(db.get_all_tags())
+        form.set_categories(read_model.get_all_categories())
+        form.set_tags(read_model.get_all_tags())
 
         # 居中显示
         self.update_idletasks()
@@ -363,7 +554,9 @@ class MainWindow(tk.Frame):
 
     def _on_edit_todo(self, todo_id):
         """编辑待办"""
-        todo = db.get_todo(todo_id)
+        from ..read_model import read_model
+
+        todo = read_model.get_todo(todo_id)
         if not todo:
             return
 
@@ -376,8 +569,8 @@ class MainWindow(tk.Frame):
             readonly=readonly,
             on_save=lambda data: self._update_todo(todo_id, data)
         )
-        form.set_categories(db.get_all_categories())
-        form.set_tags(db.get_all_tags())
+        form.set_categories(read_model.get_all_categories())
+        form.set_tags(read_model.get_all_tags())
 
         # 居中显示
         self.update_idletasks()
@@ -389,67 +582,53 @@ class MainWindow(tk.Frame):
 
     def _on_batch_action(self, action, todo_ids):
         """批量操作"""
+        from ..database import db
+
         if action == "complete":
             db.batch_complete(todo_ids)
             TaskCompletedPopup(self, len(todo_ids))
         elif action == "delete":
             if tk.messagebox.askyesno("确认", f"确定删除选中的 {len(todo_ids)} 个任务吗？"):
                 db.batch_delete(todo_ids)
-
-        self._refresh_data()
+        # 界面刷新由数据变更通知触发
 
     def _save_todo(self, data):
         """保存新待办"""
+        from ..database import db
+
         db.create_todo(**data)
-        self._refresh_data()
 
     def _update_todo(self, todo_id, data):
         """更新待办"""
-        # 提取tag_ids和recurring_weekdays用于特殊处理
-        tag_ids = data.pop("tag_ids", None)
-        recurring_weekdays = data.pop("recurring_weekdays", None)
+        from ..database import db
 
         db.update_todo(todo_id, **data)
 
-        # 更新标签关联
-        if tag_ids is not None:
-            session = db.session
-            todo = session.query(Todo).get(todo_id)
-            if todo:
-                tags = session.query(Tag).filter(Tag.id.in_(tag_ids)).all()
-                todo.tags = tags
-                session.commit()
-            session.close()
-
-        # 更新循环周几
-        if recurring_weekdays is not None:
-            session = db.session
-            todo = session.query(Todo).get(todo_id)
-            if todo:
-                todo.set_recurring_weekdays(recurring_weekdays)
-                session.commit()
-            session.close()
+    def show_reminder(self, todo):
+        """显示提醒弹窗（线程安全，由提醒服务线程调用）"""
+        self.dispatcher.post("reminder", todo)
+
+    def _show_reminders(self, todos):
+        """在主线程中将到期提醒加入提醒中心"""
+        if self._reminder_center is None or not self._reminder_center.winfo_exists():
+            self._reminder_center = ReminderCenter(
+                self,
+                on_complete=self._on_reminder_complete,
+                on_snooze=self._on_reminder_snooze
+            )
+        self._reminder_center.add_todos(todos)
 
-        self._refresh_data()
+    def _on_reminder_complete(self, todo_ids):
+        """提醒中心 - 完成"""
+        from ..database import db
 
-    def show_reminder(self, todo):
-        """显示提醒弹窗"""
-        ReminderPopup(
-            self,
-            todo,
-            on_complete=self._on_reminder_complete,
-            on_snooze=self._on_reminder_snooze
-        )
+        db.batch_complete(todo_ids)
 
-    def _on_reminder_complete(self, todo):
-        """提醒弹窗 - 完成"""
-        db.complete_todo(todo.id)
-        self._refresh_data()
+    def _on_reminder_snooze(self, todo_ids, minutes):
+        """提醒中心 - 稍后提醒"""
+        from ..database import db
 
-    def _on_reminder_snooze(self, todo, minutes):
-        """提醒弹窗 - 稍后提醒"""
-        db.snooze_reminder(todo.id, minutes)
-        self._refresh_data()
+        db.batch_snooze(todo_ids, minutes)
 
     def _show_about_menu(self, event=None):
         """显示关于菜单"""
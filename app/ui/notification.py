@@ -7,15 +7,20 @@ from .styles import COLORS, FONTS, PADDING, SIZES
 from .theme import theme
 
 
-class ReminderPopup(tk.Toplevel):
-    """提醒弹窗 - 无关闭按钮"""
+class ReminderCenter(tk.Toplevel):
+    """提醒中心 - 所有到期提醒汇总在同一个窗口中，无关闭按钮
 
-    def __init__(self, parent, todo, on_complete=None, on_snooze=None):
+    窗口只创建一次并重复使用，新到期的提醒以列表行的形式加入，
+    可对选中项或全部提醒执行完成、稍后提醒。
+    """
+
+    SNOOZE_MINUTES = [2, 5, 10, 15, 30]
+
+    def __init__(self, parent, on_complete=None, on_snooze=None):
         super().__init__(parent)
         self.title("待办提醒")
-        self.todo = todo
-        self.on_complete = on_complete
-        self.on_snooze = on_snooze
+        self.on_complete = on_complete  # on_complete(todo_ids)
+        self.on_snooze = on_snooze  # on_snooze(todo_ids, minutes)
 
         self._setup_window()
         self._build_ui()
@@ -30,7 +35,7 @@ class ReminderPopup(tk.Toplevel):
         self.overrideredirect(True)  # 无标题栏
 
         # 窗口大小
-        self.geometry("380x300")
+        self.geometry("460x360")
 
         # 关闭时不做任何操作（不销毁，只是隐藏）
         self.protocol("WM_DELETE_WINDOW", self._on_close)
@@ -56,80 +61,73 @@ class ReminderPopup(tk.Toplevel):
         )
         icon_label.pack(side="left", padx=PADDING["medium"], pady=5)
 
-        title_label = tk.Label(
+        self.title_label = tk.Label(
             header_frame,
             text="待办提醒",
             font=FONTS["subtitle"],
             bg=COLORS["primary"],
             fg="white"
         )
-        title_label.pack(side="left", pady=5)
+        self.title_label.pack(side="left", pady=5)
 
-        # 内容区域
-        content_frame = tk.Frame(main_frame, bg=COLORS["card"], pady=PADDING["medium"])
-        content_frame.pack(fill="both", expand=True, padx=PADDING["large"])
+        # 底部按钮（先布局，保证列表伸缩时按钮始终可见）
+        btn_bottom_frame = tk.Frame(main_frame, bg=COLORS["card"], pady=PADDING["small"])
+        btn_bottom_frame.pack(fill="x", side="bottom", padx=PADDING["medium"])
 
-        # 任务标题
-        theme.apply_label_style(title_label := tk.Label(
-            content_frame,
-            text=self.todo.title,
-            font=("Microsoft YaHei", 14, "bold"),
-            fg=COLORS["text"],
-            bg=COLORS["card"],
-            wraplength=320
-        ), "title")
-        title_label.pack(anchor="w", pady=(0, PADDING["small"]))
-
-        # 提醒时间
-        if self.todo.reminder_time:
-            time_str = self.todo.reminder_time.strftime("%Y-%m-%d %H:%M")
-        else:
-            time_str = "无"
-        time_label = tk.Label(
-            content_frame,
-            text=f"时间: {time_str}",
-            font=FONTS["body"],
-            fg=COLORS["text_secondary"],
-            bg=COLORS["card"]
+        complete_all_btn = tk.Button(
+            btn_bottom_frame,
+            text="✓ 全部完成",
+            font=FONTS["button"],
+            bg=COLORS["success"],
+            fg="white",
+            relief="flat",
+            bd=0,
+            padx=PADDING["medium"],
+            pady=PADDING["small"],
+            command=lambda: self._on_complete(self._all_ids())
         )
-        time_label.pack(anchor="w", pady=(0, PADDING["small"]))
-
-        # 标签
-        if self.todo.tags:
-            tags_text = " ".join([f"#{t.name}" for t in self.todo.tags])
-            tags_label = tk.Label(
-                content_frame,
-                text=tags_text,
-                font=FONTS["small"],
-                fg=COLORS["primary"],
-                bg=COLORS["card"]
-            )
-            tags_label.pack(anchor="w")
-
-        # 稍后提醒选项
-        snooze_frame = tk.Frame(content_frame, bg=COLORS["card"])
-        snooze_frame.pack(fill="x", pady=PADDING["medium"])
+        complete_all_btn.pack(side="right")
+        complete_all_btn.bind("<Enter>", lambda e: complete_all_btn.configure(bg="#43A047"))
+        complete_all_btn.bind("<Leave>", lambda e: complete_all_btn.configure(bg=COLORS["success"]))
 
-        theme.apply_label_style(
-            tk.Label(snooze_frame, text="稍后提醒:", bg=COLORS["card"]),
-            "small"
+        complete_btn = tk.Button(
+            btn_bottom_frame,
+            text="✓ 完成选中",
+            font=FONTS["button"],
+            bg=COLORS["success"],
+            fg="white",
+            relief="flat",
+            bd=0,
+            padx=PADDING["medium"],
+            pady=PADDING["small"],
+            command=lambda: self._on_complete(self._selected_ids())
         )
-        snooze_frame.pack(anchor="w")
+        complete_btn.pack(side="right", padx=PADDING["small"])
+        complete_btn.bind("<Enter>", lambda e: complete_btn.configure(bg="#43A047"))
+        complete_btn.bind("<Leave>", lambda e: complete_btn.configure(bg=COLORS["success"]))
 
-        # 稍后提醒按钮
-        btn_frame = tk.Frame(content_frame, bg=COLORS["card"])
-        btn_frame.pack(fill="x", pady=PADDING["small"])
+        # 稍后提醒按钮（作用于选中项，未选中时作用于全部）
+        snooze_frame = tk.Frame(main_frame, bg=COLORS["card"])
+        snooze_frame.pack(fill="x", side="bottom", padx=PADDING["medium"], pady=(PADDING["small"], 0))
 
-        for minutes in [2, 5, 10, 15, 30]:
+        tk.Label(
+            snooze_frame,
+            text="稍后提醒:",
+            font=FONTS["small"],
+            fg=COLORS["text_secondary"],
+            bg=COLORS["card"]
+        ).pack(side="left", padx=(0, PADDING["small"]))
+
+        for minutes in self.SNOOZE_MINUTES:
             btn = tk.Button(
-                btn_frame,
+                snooze_frame,
                 text=f"{minutes}分钟",
                 font=FONTS["small"],
                 bg=COLORS["frame"],
                 fg=COLORS["text"],
                 relief="flat",
                 bd=0,
-                padx=PADDING["medium"],
+                padx=PADDING["small"],
                 pady=4,
                 command=lambda m=minutes: self._on_snooze(m)
             )
@@ -139,28 +137,32 @@ class ReminderPopup(tk.Toplevel):
             btn.bind("<Enter>", lambda e, b=btn: b.configure(bg=COLORS["border"]))
             btn.bind("<Leave>", lambda e, b=btn: b.configure(bg=COLORS["frame"]))
 
-        # 底部按钮
-        btn_bottom_frame = tk.Frame(main_frame, bg=COLORS["card"], height=50, pady=PADDING["medium"])
-        btn_bottom_frame.pack(fill="x")
-        btn_bottom_frame.propagate(False)
+        # 提醒列表（Treeview 只绘制可见行，提醒数量多时窗口开销不变）
+        list_frame = tk.Frame(main_frame, bg=COLORS["card"])
+        list_frame.pack(fill="both", expand=True, padx=PADDING["medium"], pady=(PADDING["small"], 0))
 
-        # 完成按钮
-        complete_btn = tk.Button(
-            btn_bottom_frame,
-            text="✓ 完成",
-            font=FONTS["button"],
-            bg=COLORS["success"],
-            fg="white",
-            relief="flat",
-            bd=0,
-            padx=PADDING["xlarge"],
-            pady=PADDING["small"],
-            command=self._on_complete
+        self.tree = ttk.Treeview(
+            list_frame,
+            columns=("title", "time", "tags"),
+            show="headings",
+            selectmode="extended",
+            style="Treeview"
         )
-        complete_btn.pack(side="right", padx=PADDING["medium"])
-
-        complete_btn.bind("<Enter>", lambda e: complete_btn.configure(bg="#43A047"))
-        complete_btn.bind("<Leave>", lambda e: complete_btn.configure(bg=COLORS["success"]))
+        self.tree.heading("title", text="任务")
+        self.tree.heading("time", text="提醒时间")
+        self.tree.heading("tags", text="标签")
+        self.tree.column("title", width=220)
+        self.tree.column("time", width=100, anchor="center")
+        self.tree.column("tags", width=100)
+        theme.apply_treeview_style(self.tree)
+
+        scrollbar = ttk.Scrollbar(list_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+
+        # 双击单项直接完成
+        self.tree.bind("<Double-1>", self._on_double_click)
 
     def _center_window(self):
         """窗口居中"""
@@ -169,17 +171,75 @@ class ReminderPopup(tk.Toplevel):
         y = (self.winfo_screenheight() - self.winfo_height()) // 2
         self.geometry(f"+{x}+{y}")
 
-    def _on_complete(self):
-        """完成按钮点击"""
+    def add_todos(self, todos):
+        """加入到期的提醒（已在列表中的待办只更新显示）"""
+        for todo in todos:
+            if todo.reminder_time:
+                time_str = todo.reminder_time.strftime("%m-%d %H:%M")
+            elif todo.recurring_time:
+                time_str = todo.recurring_time.strftime("%H:%M")
+            else:
+                time_str = ""
+            tags_text = " ".join([f"#{t.name}" for t in todo.tags]) if todo.tags else ""
+            values = (todo.title, time_str, tags_text)
+
+            iid = str(todo.id)
+            if self.tree.exists(iid):
+                self.tree.item(iid, values=values)
+            else:
+                self.tree.insert("", "end", iid=iid, values=values)
+
+        self._update_title()
+        if self.tree.get_children():
+            self.deiconify()
+            self.lift()
+
+    def remove_todos(self, todo_ids):
+        """移除已处理的提醒，全部处理完后隐藏窗口"""
+        for todo_id in todo_ids:
+            iid = str(todo_id)
+            if self.tree.exists(iid):
+                self.tree.delete(iid)
+
+        self._update_title()
+        if not self.tree.get_children():
+            self.withdraw()
+
+    def _update_title(self):
+        """更新标题中的提醒数量"""
+        count = len(self.tree.get_children())
+        self.title_label.configure(text=f"待办提醒 ({count})" if count > 1 else "待办提醒")
+
+    def _all_ids(self):
+        """全部提醒的待办ID"""
+        return [int(iid) for iid in self.tree.get_children()]
+
+    def _selected_ids(self):
+        """选中提醒的待办ID"""
+        return [int(iid) for iid in self.tree.selection()]
+
+    def _on_double_click(self, event):
+        """双击完成单项"""
+        item = self.tree.identify_row(event.y)
+        if item:
+            self._on_complete([int(item)])
+
+    def _on_complete(self, todo_ids):
+        """完成"""
+        if not todo_ids:
+            return
         if self.on_complete:
-            self.on_complete(self.todo)
-        self.destroy()
+            self.on_complete(todo_ids)
+        self.remove_todos(todo_ids)
 
     def _on_snooze(self, minutes):
-        """稍后提醒"""
+        """稍后提醒（未选中时作用于全部）"""
+        todo_ids = self._selected_ids() or self._all_ids()
+        if not todo_ids:
+            return
         if self.on_snooze:
-            self.on_snooze(self.todo, minutes)
-        self.destroy()
+            self.on_snooze(todo_ids, minutes)
+        self.remove_todos(todo_ids)
 
     def _on_close(self):
         """关闭弹窗 - 隐藏但不销毁"""
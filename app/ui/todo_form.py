@@ -255,7 +255,7 @@ class TodoForm(tk.Toplevel):
         self.recurring_type_combo = ttk.Combobox(
             type_row,
             textvariable=self.recurring_type_var,
-            values=["每天", "每周"],
+            values=["每天", "每周", "每月"],
             state="readonly",
             width=10,
             font=FONTS["body"]
@@ -282,6 +282,22 @@ class TodoForm(tk.Toplevel):
             theme.apply_checkbox_style(cb)
             cb.pack(side="left", padx=(0, PADDING["small"]))
 
+        # 每月几号（仅每月显示）
+        self.monthday_frame = tk.Frame(self.recurring_frame, bg=COLORS["background"])
+        self.monthday_frame.pack(fill="x", pady=(PADDING["small"], 0))
+        tk.Label(self.monthday_frame, text="每月", bg=COLORS["background"], font=FONTS["body"]).pack(side="left")
+        self.monthday_var = tk.StringVar(value=str(datetime.now().day))
+        ttk.Combobox(
+            self.monthday_frame,
+            textvariable=self.monthday_var,
+            values=[str(d) for d in range(1, 32)],
+            width=4,
+            font=FONTS["body"],
+            state="readonly"
+        ).pack(side="left", padx=(5, 0))
+        tk.Label(self.monthday_frame, text="日（当月没有该日时为月末）", bg=COLORS["background"],
+                 font=FONTS["body"]).pack(side="left")
+
         # 循环时间
         time_row2 = tk.Frame(self.recurring_frame, bg=COLORS["background"])
         time_row2.pack(fill="x", pady=(PADDING["small"], 0))
@@ -314,7 +330,7 @@ class TodoForm(tk.Toplevel):
         recurring_minute_combo.pack(side="left", padx=(PADDING["small"], 0))
         tk.Label(time_row2, text="分", bg=COLORS["background"], font=FONTS["body"]).pack(side="left")
 
-        # 排除假期（仅"每天"时显示）
+        # 排除假期（按假期日历）
         self.exclude_holidays_var = tk.BooleanVar(value=False)
         self.exclude_holidays_cb = tk.Checkbutton(
             self.recurring_frame,
@@ -466,19 +482,24 @@ class TodoForm(tk.Toplevel):
             self._set_widget_state(child, state)
 
     def _on_recurring_type_change(self, event=None):
-        """循环类型切换 - 显示/隐藏周几选择和排除假期"""
+        """循环类型切换 - 显示/隐藏周几选择、几号选择和排除假期"""
         # 只在启用状态下才显示/隐藏
         if self.recurring_var.get():
             if self.recurring_type_var.get() == "每周":
                 self.weekday_frame.pack(fill="x", pady=(PADDING["small"], 0))
-                # 每周不显示排除假期
-                self.exclude_holidays_cb.pack_forget()
+                self.monthday_frame.pack_forget()
             else:
                 self.weekday_frame.pack_forget()
-                # 每天显示排除假期
-                self.exclude_holidays_cb.pack(anchor="w", pady=(0, PADDING["medium"]))
+                if self.recurring_type_var.get() == "每月":
+                    self.monthday_frame.pack(fill="x", pady=(PADDING["small"], 0))
+                else:
+                    self.monthday_frame.pack_forget()
+            # 排除假期（每周提醒周一至周五时，调休上班日也提醒）
+            self.exclude_holidays_cb.pack_forget()
+            self.exclude_holidays_cb.pack(anchor="w", pady=(0, PADDING["medium"]))
         else:
             self.weekday_frame.pack_forget()
+            self.monthday_frame.pack_forget()
             self.exclude_holidays_cb.pack_forget()
 
     def _load_data(self):
@@ -521,8 +542,10 @@ class TodoForm(tk.Toplevel):
             # 循环提醒
             self.recurring_var.set(self.todo.is_recurring)
             if self.todo.is_recurring:
-                type_map = {"daily": "每天", "weekly": "每周"}
+                type_map = {"daily": "每天", "weekly": "每周", "monthly": "每月"}
                 self.recurring_type_var.set(type_map.get(self.todo.recurring_type, "每天"))
+                if self.todo.recurring_monthday:
+                    self.monthday_var.set(str(self.todo.recurring_monthday))
                 if self.todo.recurring_time:
                     self.recurring_hour_var.set(f"{self.todo.recurring_time.hour:02d}")
                     self.recurring_minute_var.set(f"{self.todo.recurring_time.minute:02d}")
@@ -578,8 +601,8 @@ class TodoForm(tk.Toplevel):
 
         # 获取分类ID
         category_name = self.category_var.get()
-        from ..database import db
-        categories = db.get_all_categories()
+        from ..read_model import read_model
+        categories = read_model.get_all_categories()
         category_id = None
         for c in categories:
             if c.name == category_name:
@@ -605,10 +628,11 @@ class TodoForm(tk.Toplevel):
 
         # 循环提醒
         is_recurring = self.recurring_var.get()
-        recurring_type_map = {"每天": "daily", "每周": "weekly"}
+        recurring_type_map = {"每天": "daily", "每周": "weekly", "每月": "monthly"}
         recurring_type = None
         recurring_time = None
         recurring_weekdays = None
+        recurring_monthday = None
         if is_recurring:
             recurring_type = recurring_type_map.get(self.recurring_type_var.get())
             try:
@@ -621,6 +645,8 @@ class TodoForm(tk.Toplevel):
             # 获取选中的周几
             if self.recurring_type_var.get() == "每周":
                 recurring_weekdays = [day for day, var in self.weekday_vars.items() if var.get()]
+            elif self.recurring_type_var.get() == "每月":
+                recurring_monthday = int(self.monthday_var.get())
 
         data = {
             "title": title,
@@ -633,6 +659,7 @@ class TodoForm(tk.Toplevel):
             "recurring_type": recurring_type,
             "recurring_time": recurring_time,
             "recurring_weekdays": recurring_weekdays,
+            "recurring_monthday": recurring_monthday,
             "exclude_holidays": self.exclude_holidays_var.get()
         }
 
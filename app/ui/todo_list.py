@@ -1,4 +1,5 @@
 """任务列表组件"""
+import bisect
 import tkinter as tk
 from tkinter import ttk
 from datetime import datetime
@@ -10,13 +11,28 @@ from .theme import theme
 class TodoList(tk.Frame):
     """任务列表组件"""
 
-    def __init__(self, parent, on_item_click=None, on_item_right_click=None):
+    def __init__(self, parent, on_item_click=None, on_item_right_click=None, on_sort_change=None):
         super().__init__(parent, bg=COLORS["background"])
         self.on_item_click = on_item_click
         self.on_item_right_click = on_item_right_click
+        self.on_sort_change = on_sort_change  # 设置后排序交给数据源（数据库）完成
         self._sort_column = "priority"  # 默认排序列
         self._sort_reverse = False  # 默认升序
-        self._current_todos = []  # 当前待办列表
+        self._current_todos = []  # 当前已加载的待办列表
+        self._fetch_more = None  # 加载下一页的函数，返回 (待办列表, 是否还有更多)
+        self._total = None  # 数据总数（分页加载时）
+        self._rows = {}  # Treeview 行ID(待办ID) -> 已显示的 (values, tags)
+        self._max_moves = 32  # 超过此数量的移动改为整体重设顺序
+
+        # 虚拟列表：数据量大时只创建可见区域（加少量缓冲）的行
+        self._virtual_threshold = 1000  # 超过此数量启用虚拟列表
+        self._buffer_rows = 5  # 可见区域之外额外创建的行数
+        self._virtual = False
+        self._offset = 0  # 虚拟列表中第一行对应的待办下标
+
+        # 选中状态按待办ID保存（虚拟列表中不可见的行也保持选中）
+        self._selected_ids = set()
+        self._click_replaces = False  # 普通单击会替换选择，Ctrl/Shift 单击为追加
         self._build_ui()
 
     def _build_ui(self):
@@ -53,17 +69,40 @@ class TodoList(tk.Frame):
         # 应用Treeview样式
         theme.apply_treeview_style(self.tree)
 
+        try:
+            self._row_height = int(ttk.Style(self.tree).lookup("Treeview", "rowheight") or 32)
+        except (TypeError, ValueError):
+            self._row_height = 32
+
+        # 行样式（只需配置一次）
+        self.tree.tag_configure("completed", foreground=COLORS["text_disabled"])
+        self.tree.tag_configure("overdue", foreground=COLORS["danger"])
+        for priority in (1, 2, 3):
+            self.tree.tag_configure(f"priority_{priority}", foreground=get_priority_color(priority))
+
         # 滚动条
-        scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self.scrollbar.set)
 
         self.tree.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
+        self.scrollbar.pack(side="right", fill="y")
 
         # 绑定事件
         self.tree.bind("<Double-1>", self._on_double_click)
         self.tree.bind("<Button-3>", self._on_right_click)  # 右键点击
         self.tree.bind("<Control-a>", self._on_select_all)  # Ctrl+A 全选
+        self.tree.bind("<<TreeviewSelect>>", self._on_tree_select)
+        self.tree.bind("<Button-1>", lambda e: self._begin_click(True))
+        self.tree.bind("<Control-Button-1>", lambda e: self._begin_click(False))
+        self.tree.bind("<Shift-Button-1>", lambda e: self._begin_click(False))
+
+        # 虚拟列表的滚动（普通模式下交给Treeview默认处理）
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<MouseWheel>", self._on_mouse_wheel)
+        self.tree.bind("<Button-4>", self._on_mouse_wheel)
+        self.tree.bind("<Button-5>", self._on_mouse_wheel)
+        for key in ("<Up>", "<Down>", "<Prior>", "<Next>", "<Home>", "<End>"):
+            self.tree.bind(key, self._on_key_nav)
 
         # 右键菜单
         self._setup_context_menu()
@@ -93,9 +132,8 @@ class TodoList(tk.Frame):
         """双击编辑"""
         item = self.tree.identify_row(event.y)
         if item:
-            todo_id = self.tree.item(item, "values")[0]
             if self.on_item_click:
-                self.on_item_click(todo_id)
+                self.on_item_click(int(item))
 
     def _on_right_click(self, event):
         """右键点击"""
@@ -103,27 +141,149 @@ class TodoList(tk.Frame):
         item = self.tree.identify_row(event.y)
         if item:
             if item not in self.tree.selection():
-                self.tree.selection_set(item)
+                self._selected_ids = {int(item)}
+                self._sync_tree_selection()
         self.context_menu.post(event.x_root, event.y_root)
 
     def _on_batch_complete(self):
         """批量完成"""
-        selected = self.tree.selection()
-        if selected and self.on_item_right_click:
-            todo_ids = [self.tree.item(item, "values")[0] for item in selected]
+        todo_ids = self.get_selected_ids()
+        if todo_ids and self.on_item_right_click:
             self.on_item_right_click("complete", todo_ids)
 
     def _on_batch_delete(self):
         """批量删除"""
-        selected = self.tree.selection()
-        if selected and self.on_item_right_click:
-            todo_ids = [self.tree.item(item, "values")[0] for item in selected]
+        todo_ids = self.get_selected_ids()
+        if todo_ids and self.on_item_right_click:
             self.on_item_right_click("delete", todo_ids)
 
     def _on_select_all(self, event=None):
         """全选"""
-        for item in self.tree.get_children():
-            self.tree.selection_add(item)
+        self.select_all()
+        return "break"
+
+    # ========== 选择 ==========
+
+    def _begin_click(self, replaces):
+        """记录单击类型，供随后的选择事件判断是否替换选择"""
+        self._click_replaces = replaces
+        self.after_idle(self._end_click)
+
+    def _end_click(self):
+        """单击引起的选择事件处理完毕"""
+        self._click_replaces = False
+
+    def _on_tree_select(self, event=None):
+        """Treeview 选择变化 - 同步到按ID保存的选择集合"""
+        tree_selected = {int(item) for item in self.tree.selection()}
+        if self._click_replaces:
+            self._selected_ids = tree_selected
+        else:
+            shown = {int(iid) for iid in self._rows}
+            self._selected_ids = (self._selected_ids - shown) | tree_selected
+
+    def _sync_tree_selection(self):
+        """将选择集合应用到当前已创建的行"""
+        wanted = [iid for iid in self._rows if int(iid) in self._selected_ids]
+        if set(wanted) != set(self.tree.selection()):
+            self.tree.selection_set(wanted)
+
+    # ========== 虚拟列表 ==========
+
+    def _set_virtual(self, virtual):
+        """切换虚拟列表模式"""
+        if virtual == self._virtual:
+            return
+        self._virtual = virtual
+        if virtual:
+            # 滚动条改为控制数据窗口的位置
+            self.scrollbar.configure(command=self._on_scrollbar)
+            self.tree.configure(yscrollcommand="")
+        else:
+            self.scrollbar.configure(command=self.tree.yview)
+            self.tree.configure(yscrollcommand=self.scrollbar.set)
+
+    def _visible_rows(self):
+        """可见区域能显示的行数"""
+        # 减去表头一行
+        return max(1, self.tree.winfo_height() // self._row_height - 1)
+
+    def _scroll_to(self, offset):
+        """虚拟列表滚动到指定位置"""
+        limit = max(0, self._list_size() - self._visible_rows())
+        offset = max(0, min(offset, limit))
+        if offset != self._offset:
+            self._offset = offset
+            self._refresh_display()
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        """虚拟列表滚动条操作"""
+        if action == "moveto":
+            self._scroll_to(int(float(amount) * self._list_size()))
+        elif action == "scroll":
+            step = self._visible_rows() if unit == "pages" else 1
+            self._scroll_to(self._offset + int(amount) * step)
+
+    def _on_mouse_wheel(self, event):
+        """虚拟列表鼠标滚轮"""
+        if not self._virtual:
+            return None
+        if event.num == 4:
+            units = -3
+        elif event.num == 5:
+            units = 3
+        else:
+            units = -3 if event.delta > 0 else 3
+        self._scroll_to(self._offset + units)
+        return "break"
+
+    def _on_key_nav(self, event):
+        """虚拟列表键盘导航（移动焦点并在需要时滚动数据窗口）"""
+        if not self._virtual or not self._current_todos:
+            return None
+
+        visible = self._visible_rows()
+        focus = self.tree.focus()
+        if focus and self.tree.exists(focus):
+            index = self._offset + self.tree.index(focus)
+        else:
+            index = self._offset
+        steps = {"Up": -1, "Down": 1, "Prior": -visible, "Next": visible}
+        if event.keysym == "Home":
+            index = 0
+        elif event.keysym == "End":
+            index = self._list_size() - 1
+        else:
+            index += steps.get(event.keysym, 0)
+        self._ensure_loaded(index + 1)
+        index = max(0, min(index, len(self._current_todos) - 1))
+
+        # 保证焦点行在可见区域内
+        if index < self._offset:
+            self._scroll_to(index)
+        elif index >= self._offset + visible:
+            self._scroll_to(index - visible + 1)
+
+        iid = str(self._current_todos[index].id)
+        self._selected_ids = {self._current_todos[index].id}
+        self._sync_tree_selection()
+        if self.tree.exists(iid):
+            self.tree.focus(iid)
+        return "break"
+
+    def _on_resize(self, event=None):
+        """列表尺寸变化时重新计算虚拟窗口"""
+        if self._virtual:
+            self._refresh_display()
+
+    def _update_scrollbar(self):
+        """更新虚拟列表滚动条位置"""
+        total = self._list_size()
+        if not total:
+            self.scrollbar.set(0, 1)
+            return
+        visible = self._visible_rows()
+        self.scrollbar.set(self._offset / total, min(1.0, (self._offset + visible) / total))
 
     def _sort_by_column(self, column):
         """按列排序"""
@@ -135,10 +295,20 @@ class TodoList(tk.Frame):
             self._sort_column = column
             self._sort_reverse = False
 
+        # 由数据源按新的排序重新加载
+        if self.on_sort_change:
+            self.on_sort_change(self._sort_column, self._sort_reverse)
+            return
+
         # 重新排序并刷新
         self._sort_todos()
         self._refresh_display()
 
+    @property
+    def sort_state(self):
+        """当前排序 (列, 是否降序)"""
+        return self._sort_column, self._sort_reverse
+
     def _sort_todos(self):
         """对待办列表排序"""
         if not self._current_todos:
@@ -160,26 +330,133 @@ class TodoList(tk.Frame):
 
         self._current_todos.sort(key=get_sort_key, reverse=self._sort_reverse)
 
-    def _refresh_display(self):
-        """刷新显示"""
-        # 清空现有内容
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+    def _list_size(self):
+        """列表总行数（分页加载时包括尚未加载的行）"""
+        if self._fetch_more and self._total is not None:
+            return max(self._total, len(self._current_todos))
+        return len(self._current_todos)
+
+    def _ensure_loaded(self, count):
+        """分页加载，直到已加载的行数达到 count 或没有更多数据"""
+        while self._fetch_more and len(self._current_todos) < count:
+            todos, has_more = self._fetch_more()
+            self._current_todos.extend(todos)
+            if not has_more or not todos:
+                self._fetch_more = None
 
-        # 插入新数据
-        for todo in self._current_todos:
-            self._insert_todo(todo)
+    def _refresh_display(self):
+        """刷新显示 - 只对变化的行做插入/删除/更新/移动"""
+        total = self._list_size()
+        self._set_virtual(total > self._virtual_threshold)
+
+        if self._virtual:
+            visible = self._visible_rows()
+            self._offset = max(0, min(self._offset, total - visible))
+            end = self._offset + visible + self._buffer_rows
+            self._ensure_loaded(end)
+            window = self._current_todos[self._offset:end]
+        else:
+            self._offset = 0
+            self._ensure_loaded(total)
+            window = self._current_todos
+
+        now = datetime.now()
+        self._apply_rows([(str(todo.id),) + self._row_data(todo, now) for todo in window])
+        self._sync_tree_selection()
+
+        if self._virtual:
+            self.tree.yview_moveto(0)
+            self._update_scrollbar()
+
+    def _apply_rows(self, rows):
+        """将 Treeview 更新为指定的行列表 [(行ID, values, tags)]"""
+        wanted = [iid for iid, _, _ in rows]
+        wanted_set = set(wanted)
+
+        # 删除不再需要的行
+        stale = [iid for iid in self._rows if iid not in wanted_set]
+        if stale:
+            self.tree.delete(*stale)
+            for iid in stale:
+                del self._rows[iid]
+
+        # 插入新行、更新变化的行
+        for iid, values, tags in rows:
+            data = (values, tags)
+            if iid not in self._rows:
+                self.tree.insert("", "end", iid=iid, values=values, tags=tags)
+            elif self._rows[iid] != data:
+                self.tree.item(iid, values=values, tags=tags)
+            self._rows[iid] = data
+
+        # 调整顺序：保留相对顺序不变的最长子序列，只移动其余行
+        current = self.tree.get_children()
+        if tuple(wanted) == current:
+            return
+        position = {iid: index for index, iid in enumerate(current)}
+        stable = self._longest_ordered(wanted, position)
+        if len(wanted) - len(stable) > self._max_moves:
+            # 大范围重排（如切换排序）一次性设置顺序
+            self.tree.set_children("", *wanted)
+            return
 
-    def load_todos(self, todos):
-        """加载待办列表"""
+        previous = None
+        for iid in wanted:
+            if iid not in stable:
+                # 先摘除再插回，避免向后移动时位置计算受自身影响
+                self.tree.detach(iid)
+                index = self.tree.index(previous) + 1 if previous else 0
+                self.tree.move(iid, "", index)
+            previous = iid
+
+    @staticmethod
+    def _longest_ordered(iids, position):
+        """返回 iids 中按 position 递增的最长子序列（集合）"""
+        tails = []  # tails[k] = 长度为 k+1 的递增子序列的最小结尾位置
+        tail_iids = []
+        parents = {}
+        for iid in iids:
+            pos = position[iid]
+            k = bisect.bisect_left(tails, pos)
+            parents[iid] = tail_iids[k - 1] if k > 0 else None
+            if k == len(tails):
+                tails.append(pos)
+                tail_iids.append(iid)
+            else:
+                tails[k] = pos
+                tail_iids[k] = iid
+
+        result = set()
+        iid = tail_iids[-1] if tail_iids else None
+        while iid is not None:
+            result.add(iid)
+            iid = parents[iid]
+        return result
+
+    def load_todos(self, todos, fetch_more=None, total=None):
+        """加载待办列表
+
+        fetch_more: 分页加载时获取下一页的函数，返回 (待办列表, 是否还有更多)
+        total: 分页加载时的数据总数
+        """
         self._current_todos = list(todos)
-        # 按当前排序重新排序
-        self._sort_todos()
+        self._fetch_more = fetch_more
+        self._total = total
+        # 去掉已不在列表中的选中项
+        if self._selected_ids:
+            self._selected_ids &= {todo.id for todo in self._current_todos}
+        # 按当前排序重新排序（排序交给数据源时数据已有序）
+        if not self.on_sort_change:
+            self._sort_todos()
         # 刷新显示
         self._refresh_display()
 
-    def _insert_todo(self, todo):
-        """插入单个待办"""
+    def loaded_count(self):
+        """已加载的行数"""
+        return len(self._current_todos)
+
+    def _row_data(self, todo, now):
+        """计算单个待办的显示数据 (values, tags)"""
         # 分类名称
         category_name = todo.category.name if todo.category else ""
 
@@ -193,8 +470,6 @@ class TodoList(tk.Frame):
         reminder_text = ""
         if todo.reminder_time:
             reminder_text = todo.reminder_time.strftime("%m-%d %H:%M")
-        else:
-            reminder_text = ""
 
         # 创建时间 - 显示完整时间
         created_text = todo.created_at.strftime("%Y-%m-%d %H:%M") if todo.created_at else ""
@@ -202,51 +477,40 @@ class TodoList(tk.Frame):
         # 完成状态
         completed_text = "✓" if todo.completed else "☐"
 
-        # 根据优先级获取颜色
-        priority_color = get_priority_color(todo.priority)
-
-        # 插入行
-        item_id = self.tree.insert(
-            "",
-            "end",
-            values=(
-                todo.id,
-                completed_text,
-                todo.title,
-                todo.priority_text,
-                category_name,
-                tags_text,
-                reminder_text,
-                created_text
-            )
+        values = (
+            todo.id,
+            completed_text,
+            todo.title,
+            todo.priority_text,
+            category_name,
+            tags_text,
+            reminder_text,
+            created_text
         )
 
-        # 设置行样式
+        # 行样式
         if todo.completed:
-            self.tree.item(item_id, tags=("completed",))
+            tags = ("completed",)
+        elif todo.reminder_time and todo.reminder_time < now:
+            # 已过期
+            tags = ("overdue",)
         else:
-            # 检查是否过期
-            if todo.reminder_time and todo.reminder_time < datetime.now():
-                self.tree.item(item_id, tags=("overdue",))
-            else:
-                # 使用优先级颜色给标题着色
-                color_tag = f"priority_{todo.priority}"
-                self.tree.tag_configure(color_tag, foreground=priority_color)
-                self.tree.item(item_id, tags=(color_tag,))
+            # 使用优先级颜色给标题着色
+            tags = (f"priority_{todo.priority}",)
 
-        # 配置标签样式
-        self.tree.tag_configure("completed", foreground=COLORS["text_disabled"])
-        self.tree.tag_configure("overdue", foreground=COLORS["danger"])
+        return values, tags
 
     def get_selected_ids(self):
-        """获取选中的待办ID列表"""
-        return [self.tree.item(item, "values")[0] for item in self.tree.selection()]
+        """获取选中的待办ID列表（按列表顺序，包含虚拟列表中不可见的行）"""
+        return [todo.id for todo in self._current_todos if todo.id in self._selected_ids]
 
     def select_all(self):
-        """全选"""
-        for item in self.tree.get_children():
-            self.tree.selection_add(item)
+        """全选（分页加载时先加载剩余数据）"""
+        self._ensure_loaded(float("inf"))
+        self._selected_ids = {todo.id for todo in self._current_todos}
+        self._sync_tree_selection()
 
     def clear_selection(self):
         """清除选择"""
-        self.tree.selection_remove(self.tree.selection())
+        self._selected_ids = set()
+        self._sync_tree_selection()
@@ -1,7 +1,8 @@
-"""系统托盘图标模块"""
+"""系统托盘图标模块
+
+pystray 和 PIL 在托盘图标第一次显示时才导入，不影响启动速度。
+"""
 import threading
-import pystray
-from PIL import Image, ImageDraw
 import tkinter as tk
 
 from .styles import COLORS
@@ -27,6 +28,8 @@ class SystemTray:
 
     def create_icon(self):
         """创建托盘图标"""
+        from PIL import Image, ImageDraw
+
         # 创建图标图像
         size = 64
         image = Image.new('RGBA', (size, size), (0, 0, 0, 0))
@@ -59,6 +62,8 @@ class SystemTray:
 
     def _create_menu(self):
         """创建右键菜单"""
+        import pystray
+
         menu = pystray.Menu(
             pystray.MenuItem(
                 '显示/隐藏窗口',
@@ -111,6 +116,8 @@ class SystemTray:
         if self._running:
             return
 
+        import pystray
+
         self._running = True
         image = self.create_icon()
         menu = self._create_menu()
@@ -1,14 +1,14 @@
-"""TodoX - 待办事项提醒工具"""
+"""TodoX - 待办事项提醒工具
+
+启动时只导入绘制窗口所需的模块：窗口先显示，数据库（SQLAlchemy）、提醒服务（APScheduler）
+在后台线程中初始化，托盘（pystray、PIL）在第一次关闭窗口时才导入。
+可用 python -X importtime main.py 检查导入耗时。
+"""
 import sys
-import tkinter as tk
-from tkinter import messagebox
 import ctypes
+import threading
 
-from app.ui.main_window import MainWindow
-from app.ui.tray_icon import SystemTray
-from app.ui.styles import COLORS
-from app.reminder import reminder_service
-from app.database import db
+# 界面模块（tkinter、pystray 等）只在界面模式下导入，命令行和无界面模式不依赖它们
 
 # 单实例检查
 INSTANCE_MUTEX_NAME = "TodoX_SingleInstance_Mutex"
@@ -28,7 +28,10 @@ def check_single_instance():
 class TodoXApp:
     """TodoX应用"""
 
-    def __init__(self):
+    def __init__(self, api_address=None):
+        import tkinter as tk
+        from app.ui.main_window import MainWindow
+
         self.root = tk.Tk()
         self.root.title("TodoX - 待办事项管理")
         self.root.geometry("1100x600")
@@ -37,35 +40,86 @@ class TodoXApp:
         # 设置样式
         self._setup_styles()
 
-        # 创建主窗口
+        # 创建主窗口（此时不连接数据库，列表为空）
         self.main_window = MainWindow(self.root)
         self.main_window.pack(fill="both", expand=True)
+        self.main_window.dispatcher.register("services_ready", self._on_services_ready, coalesce=True)
+        self.main_window.dispatcher.register("startup_failed", self._on_startup_failed)
+        self.main_window.dispatcher.register("api_failed", self._on_api_failed)
 
-        # 设置提醒服务
-        reminder_service.setup(self.main_window)
-
-        # 初始化系统托盘
-        self.tray = SystemTray()
-        self.tray.setup(self.root, on_quit=self._on_quit)
+        # 系统托盘在第一次关闭窗口时创建
+        self.tray = None
 
         # 绑定关闭事件
         self.root.protocol("WM_DELETE_WINDOW", self._on_close)
 
-        # 启动提醒服务
-        reminder_service.start()
+        # 数据库、提醒服务、本地 HTTP 接口（可选）在后台线程中启动，不阻塞首次绘制
+        self.api_server = None
+        self._api_address = api_address
+        threading.Thread(target=self._start_services, name="startup", daemon=True).start()
+
+    def _start_services(self):
+        """打开数据库并启动提醒服务、本地接口（后台线程）"""
+        try:
+            from app.database import db
+            from app.reminder import reminder_service
+
+            db.open()
+            self.main_window.dispatcher.post("services_ready")
+
+            reminder_service.setup(self.main_window)
+            reminder_service.start()
+        except Exception as e:
+            self.main_window.dispatcher.post("startup_failed", e)
+            return
+
+        # 接口启动失败（如端口被占用）只提示，不影响界面和提醒
+        if self._api_address:
+            try:
+                from app.daemon import start_api
+                self.api_server = start_api(self._api_address)
+            except Exception as e:
+                self.main_window.dispatcher.post("api_failed", e)
+
+    def _on_services_ready(self):
+        """数据库已打开 - 加载数据"""
+        self.main_window.load()
+
+    def _on_api_failed(self, errors):
+        """本地接口启动失败"""
+        from tkinter import messagebox
+
+        messagebox.showwarning("提示", f"本地 HTTP 接口启动失败:\n{str(errors[0])}")
+
+    def _on_startup_failed(self, errors):
+        """后台启动失败"""
+        from tkinter import messagebox
+
+        messagebox.showerror("错误", f"程序启动失败:\n{str(errors[0])}")
+        self._on_quit()
 
     def _setup_styles(self):
         """设置全局样式"""
+        from app.ui.styles import COLORS
         self.root.configure(bg=COLORS["background"])
 
     def _on_close(self):
         """窗口关闭事件 - 最小化到托盘"""
         self.root.withdraw()
+        if self.tray is None:
+            from app.ui.tray_icon import SystemTray
+
+            self.tray = SystemTray()
+            self.tray.setup(self.root, on_quit=self._on_quit)
         if not self.tray._running:
             self.tray.run()
 
     def _on_quit(self):
         """退出程序"""
+        from app.reminder import reminder_service
+
+        if self.api_server:
+            self.api_server.stop()
         reminder_service.stop()
         self.root.destroy()
         sys.exit(0)
@@ -77,13 +131,36 @@ class TodoXApp:
 
 def main():
     """主入口"""
+    # 命令行批量导入/导出：python main.py import|export 文件路径
+    if len(sys.argv) > 1 and sys.argv[1] == "import":
+        from app.importer import main as import_main
+        sys.exit(import_main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "export":
+        from app.exporter import main as export_main
+        sys.exit(export_main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "import-holidays":
+        from app.holiday_importer import main as holiday_main
+        sys.exit(holiday_main(sys.argv[2:]))
+
+    # 无界面提醒服务：python main.py --daemon
+    if len(sys.argv) > 1 and sys.argv[1] == "--daemon":
+        from app.daemon import main as daemon_main
+        sys.exit(daemon_main(sys.argv[2:]))
+
+    from tkinter import messagebox
+
     # 单实例检查
     if not check_single_instance():
         messagebox.showwarning("提示", "TodoX 已在运行中")
         return
 
+    # 可选的本地 HTTP 接口：python main.py --api [主机:]端口
+    api_address = None
+    if "--api" in sys.argv[1:-1]:
+        api_address = sys.argv[sys.argv.index("--api") + 1]
+
     try:
-        app = TodoXApp()
+        app = TodoXApp(api_address)
         app.run()
     except Exception as e:
         messagebox.showerror("错误", f"程序启动失败:\n{str(e)}")